@@ -10,10 +10,15 @@ The data is then written to an Excel file, with each label's data on a separate
 - All Relationships (combined incoming and outgoing)
 - Incoming Relationships
 - Outgoing Relationships
+- Property Sampling (whether the properties are exact or discovered from a sample of nodes)
+- Relationship Count (number of relationships for each entry of All Relationships)
 """
 
-import openpyxl
-from neo4j import GraphDatabase
+import argparse
+
+from neo4j_query_profiler import QueryProfiler
+from neo4j_schema_export import create_driver, extract_records, iter_records, write_records
+from neo4j_schema_sinks import StreamingExcelSink, excel_row, property_stats_rows, write_to_excel
 
 # Neo4j connection details
 # Replace with actual Neo4j URI 
@@ -23,147 +28,99 @@ username = "your_username_here"
 # Replace with actual password
 password = "your_password_here"  
 
-# Initialize the Neo4j driver
-driver = GraphDatabase.driver(uri, auth=(username, password))
-
-# Function to retrieve all labels in the database
-def get_all_labels():
-    print("Fetching all labels...")
-    try:
-        with driver.session() as session:
-            result = session.run("CALL db.labels()")
-            labels = [record["label"] for record in result]
-            print(f"Labels found: {labels}")
-            return labels
-    except Exception as e:
-        print(f"Error retrieving labels: {e}")
-        return []
-
-# Function to get distinct properties for a label
-def get_distinct_properties(label_name):
-    print(f"Fetching properties for label: {label_name}")
-    query = f"""
-    MATCH (n:`{label_name}`)
-    WITH collect(DISTINCT keys(n)) AS allKeys
-    UNWIND allKeys AS keysList
-    UNWIND keysList AS key
-    RETURN DISTINCT key
-    """
-    try:
-        with driver.session() as session:
-            result = session.run(query)
-            properties = [record["key"] for record in result]
-            print(f"Properties for {label_name}: {properties}")
-            return properties
-    except Exception as e:
-        print(f"Error retrieving properties for {label_name}: {e}")
-        return []
-
-# Function to get all relationships with connected node labels for a label, separated by direction
-def get_all_relationships(label_name):
-    print(f"Fetching relationships for label: {label_name}")
-    try:
-        # Query for incoming relationships
-        incoming_query = f"""
-        MATCH (a:`{label_name}`)<-[r]-(b)
-        RETURN DISTINCT type(r) AS relationship_name, labels(b) AS connected_labels
-        """
-        # Query for outgoing relationships
-        outgoing_query = f"""
-        MATCH (a:`{label_name}`)-[r]->(b)
-        RETURN DISTINCT type(r) AS relationship_name, labels(b) AS connected_labels
-        """
-        
-        with driver.session() as session:
-            # Execute the incoming relationships query
-            incoming_result = session.run(incoming_query)
-            incoming_relationships = [
-                f"{record['relationship_name']} ({', '.join(record['connected_labels'])})"
-                for record in incoming_result
-            ]
-
-            # Execute the outgoing relationships query
-            outgoing_result = session.run(outgoing_query)
-            outgoing_relationships = [
-                f"{record['relationship_name']} ({', '.join(record['connected_labels'])})"
-                for record in outgoing_result
-            ]
-            
-            print(f"Incoming relationships for {label_name}: {incoming_relationships}")
-            print(f"Outgoing relationships for {label_name}: {outgoing_relationships}")
-            
-            return incoming_relationships, outgoing_relationships
-    except Exception as e:
-        print(f"Error retrieving relationships for {label_name}: {e}")
-        return [], []
-
-# Function to write the results to an Excel file with multiple sheets, sorted alphabetically by label name
-def write_to_excel(data, filename="F:/Etolv/Scripts/Excels/neo4j_data_labels_properties_relationships.xlsx"):
-    print(f"Writing data to {filename}...")
-
-    # Sort data alphabetically by label name
-    data.sort(key=lambda x: x[0])
-
-    workbook = openpyxl.Workbook()
-    workbook.remove(workbook.active)  # Remove the default sheet
-
-    for label, properties, all_relationships, incoming_relationships, outgoing_relationships in data:
-        # Create a new sheet for each label in alphabetical order
-        worksheet = workbook.create_sheet(title=label[:31])  # Limit sheet name to 31 characters
-
-        # Write the header
-        worksheet.append(["Label", "Property", "All Relationship", "Incoming Relationship", "Outgoing Relationship"])
-
-        # Write properties, each in a separate row
-        max_rows = max(len(properties), len(all_relationships), len(incoming_relationships), len(outgoing_relationships))
-        
-        for i in range(max_rows):
-            row = [
-                label if i == 0 else "",  # Only write the label name in the first row
-                properties[i] if i < len(properties) else "",
-                all_relationships[i] if i < len(all_relationships) else "",
-                incoming_relationships[i] if i < len(incoming_relationships) else "",
-                outgoing_relationships[i] if i < len(outgoing_relationships) else ""
-            ]
-            worksheet.append(row)
-
-        print(f"Data written for sheet: {label}")
-
-    workbook.save(filename)
-    print(f"Data successfully written to {filename}")
+# Excel file the results are written to
+output_file = "F:/Etolv/Scripts/Excels/neo4j_data_labels_properties_relationships.xlsx"
+# Set to True to write each sheet as soon as its label is extracted with a write-only workbook, plus an index sheet
+# Memory then stays flat for thousands of labels; in concurrent mode the sheets are in extraction order
+streaming_excel = False
+# Set to True to extract labels concurrently instead of with bulk queries
+concurrent_extraction = False
+# Maximum number of labels queried at the same time in concurrent mode
+max_in_flight = 8
+# Property keys of labels above exact_threshold nodes are discovered from a sample of sample_size nodes
+# strategy is one of "exact", "first", "random" or "stratified"
+property_sampling = {"strategy": "exact", "sample_size": 10000, "exact_threshold": 1000000}
+# Relationships are discovered with one aggregated pass, or per relationship type with at most
+# max_degree relationships expanded for each of node_sample_size nodes (strategy "by_type")
+relationship_discovery = {"strategy": "aggregated", "node_sample_size": 1000, "max_degree": 100}
+# Set to a JSON file path to only re-extract labels that changed since the last run (None to disable)
+snapshot_file = None
+# File the schema diff against the previous snapshot is written to
+diff_report_file = "F:/Etolv/Scripts/schema_diff.json"
+# Seconds each per-label query may take (None for no limit), a label that runs out of time is retried with
+# a LIMIT-bounded scan of fallback_node_limit nodes and marked as degraded
+label_budget = {"timeout": None, "fallback_node_limit": 10000}
+# Set to a dict to profile the property values of every label (types, fill rate, approximate distinct count,
+# ranges and examples), fetching batch_size nodes at a time and profiling at most max_nodes nodes per label (None for all)
+property_stats = None  # e.g. {"batch_size": 10000, "max_nodes": 100000, "examples": 5}
+# Set to a JSONL file path to journal every label as soon as it is extracted (None to disable)
+checkpoint_file = None
+# Set to True to skip the labels already in the checkpoint journal and rebuild the output from it
+resume = False
+# Set to a JSON file path to record the timing of every query and print the slowest labels (None to disable)
+query_report_file = None
+# Set to True to run every query with PROFILE and record its database hits in the query report
+profile_queries = False
+
+# Function to parse the command line arguments, the settings above are the defaults
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the labels, properties and relationships of a Neo4j database to Excel, one sheet per label.")
+    parser.add_argument("--uri", default=uri, help="Neo4j URI")
+    parser.add_argument("--username", default=username, help="Neo4j username")
+    parser.add_argument("--password", default=password, help="Neo4j password")
+    parser.add_argument("--output", default=output_file, help="Excel file the results are written to")
+    return parser.parse_args()
 
 # Main function to process all labels and collect their properties/relationships
 def main():
+    args = parse_args()
     print("Starting data extraction...")
-    labels = get_all_labels()
-    if not labels:
+    # The driver is created here rather than at import time, so importing this module never connects
+    driver = create_driver(args.uri, args.username, args.password)
+    # Every query is timed when a query report is requested
+    profiler = QueryProfiler(profile=profile_queries) if query_report_file else None
+    try:
+        records = iter_records if streaming_excel else extract_records
+        records = records(
+            profiler.wrap(driver) if profiler else driver,
+            concurrent_extraction=concurrent_extraction,
+            max_in_flight=max_in_flight,
+            sampling=property_sampling,
+            discovery=relationship_discovery,
+            snapshot_file=snapshot_file,
+            diff_report_file=diff_report_file,
+            checkpoint_file=checkpoint_file,
+            resume=resume,
+            budget=label_budget if label_budget.get("timeout") else None,
+            property_stats=property_stats,
+        )
+
+        if streaming_excel:
+            # Each sheet is written as soon as its label is extracted
+            written = write_records(records, [StreamingExcelSink(args.output)])
+        else:
+            data = []
+            stats_rows = []
+            for record in records:
+                # Prepare the row data to write to Excel
+                data.append(excel_row(record))
+                stats_rows.extend(property_stats_rows(record))
+                print(f"Data for {record['label']}: {data[-1]}")
+            written = len(data)
+            if data:
+                # Write collected data to Excel
+                write_to_excel(data, args.output, stats_rows)
+    finally:
+        # Close the Neo4j driver connection
+        driver.close()
+
+    if profiler:
+        profiler.write_report(query_report_file)
+    if not written:
         print("No labels found in the database.")
         return
-
-    data = []
-    for label in labels:
-        # Fetch properties for the current label
-        properties = get_distinct_properties(label)
-        # Fetch incoming and outgoing relationships for the current label
-        incoming_relationships, outgoing_relationships = get_all_relationships(label)
-        # Combine all relationships in one field for the 'All Relationships' column
-        all_relationships = incoming_relationships + outgoing_relationships
-        # Prepare the row data to write to Excel
-        data.append([
-            label,
-            properties,
-            all_relationships,
-            incoming_relationships,
-            outgoing_relationships
-        ])
-        print(f"Data for {label}: {data[-1]}")
-
-    # Write collected data to Excel
-    write_to_excel(data)
     print("Data extraction completed.")
 
 # Run the main function
 if __name__ == "__main__":
     main()
-    # Close the Neo4j driver connection
-    driver.close()
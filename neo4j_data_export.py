@@ -0,0 +1,293 @@
+"""
+This Python script exports the data stored in a Neo4j database, not only its schema. Every label is streamed in bounded batches and written to chunked files, so memory stays flat no matter how big a label is:
+- Nodes: Every node of the label with its element id and one column per property key. The columns are the property keys get_distinct_properties discovers for the label, keys missing from that set are kept as JSON in an extra column.
+- Relationships: Every outgoing relationship of the label's nodes with its element id, type, source and target element ids and its properties as JSON.
+
+Nodes and relationships are read with one streamed query per label and kind, so the label is scanned (and its relationships expanded) only once. The session is opened with fetch_size set to the batch size, so the driver pulls one batch of records from the server at a time while they are consumed, and the result stays open until the label is exported. The batches flow through generators into a writer that starts a new file every rows_per_file rows:
+- output_dir/<label>/nodes_00000.parquet, nodes_00001.parquet, ...
+- output_dir/<label>/relationships_00000.parquet, ...
+
+Files are written as Parquet (needs pyarrow) or CSV. Every Parquet file is written one row group per batch, so only one batch is held in memory. The column types are taken from the first batch of the label; when a later batch holds values a column cannot store, that column is stored as strings from the next file on, so the files of one label can disagree on the type of such a column and readers combining them have to cast it to string. A manifest listing the exported rows and files of every label is written to output_dir/export_manifest.json.
+
+Example:
+    python neo4j_data_export.py --uri neo4j://localhost:7687 --username neo4j --output-dir data --format parquet --labels Person Company
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+
+from neo4j_schema_export import create_driver
+from neo4j_schema_extractor import get_all_labels, get_distinct_properties, iter_batches, iter_node_batches
+
+# Default number of nodes or relationships read per query
+BATCH_SIZE = 10000
+# Default number of rows written per file
+ROWS_PER_FILE = 1000000
+# Name of the manifest file written to the output directory
+EXPORT_MANIFEST = "export_manifest.json"
+# Column with the element id of every node or relationship
+ID_COLUMN = "element_id"
+# Column with the node properties that are not in the label's discovered property keys, as JSON
+OTHER_PROPERTIES_COLUMN = "other_properties"
+# Columns of the relationship files
+RELATIONSHIP_COLUMNS = [ID_COLUMN, "type", "source_id", "target_id", "properties"]
+
+
+# Function to convert a property value to a value every file format can store
+# Lists and maps are stored as JSON, temporal and spatial values as their string representation
+def to_cell(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+# Function to turn a label into a directory name that is valid on every file system
+def label_directory(output_dir, label):
+    return os.path.join(output_dir, re.sub(r"[^\w.-]", "_", label))
+
+
+# Function to read the outgoing relationships of a label batch by batch from one streamed query
+def iter_relationship_batches(session, label, batch_size=BATCH_SIZE):
+    result = session.run(f"""
+    MATCH (a:`{label}`)-[r]->(b)
+    RETURN elementId(r) AS id, type(r) AS type, elementId(a) AS source_id, elementId(b) AS target_id, properties(r) AS properties
+    """)
+    yield from iter_batches(result, batch_size)
+
+
+# Function to turn batches of nodes into batches of rows with one column per discovered property key
+def iter_node_rows(batches, properties):
+    columns = set(properties)
+    for batch in batches:
+        rows = []
+        for record in batch:
+            values = record["properties"]
+            row = {ID_COLUMN: record["id"]}
+            row.update((key, to_cell(values.get(key))) for key in properties)
+            other = {key: value for key, value in values.items() if key not in columns}
+            row[OTHER_PROPERTIES_COLUMN] = json.dumps(other, default=str) if other else None
+            rows.append(row)
+        yield rows
+
+
+# Function to turn batches of relationships into batches of rows
+def iter_relationship_rows(batches):
+    for batch in batches:
+        yield [
+            {
+                ID_COLUMN: record["id"],
+                "type": record["type"],
+                "source_id": record["source_id"],
+                "target_id": record["target_id"],
+                "properties": json.dumps(dict(record["properties"]), default=str) if record["properties"] else None,
+            }
+            for record in batch
+        ]
+
+
+# Writer streaming rows into CSV files, starting a new file every rows_per_file rows
+class ChunkedCsvWriter:
+    extension = "csv"
+
+    def __init__(self, directory, prefix, columns, rows_per_file=ROWS_PER_FILE):
+        self.directory = directory
+        self.prefix = prefix
+        self.columns = columns
+        self.rows_per_file = rows_per_file
+        self.files = []
+        self.rows = 0
+        self.file = None
+        self.writer = None
+        self.rows_in_file = 0
+
+    def next_filename(self):
+        return os.path.join(self.directory, f"{self.prefix}_{len(self.files):05d}.{self.extension}")
+
+    def write(self, rows):
+        for row in rows:
+            if self.file is None or self.rows_in_file >= self.rows_per_file:
+                self.close()
+                filename = self.next_filename()
+                self.file = open(filename, mode="w", newline="", encoding="utf-8")
+                self.writer = csv.DictWriter(self.file, fieldnames=self.columns)
+                self.writer.writeheader()
+                self.files.append(filename)
+                self.rows_in_file = 0
+            self.writer.writerow(row)
+            self.rows_in_file += 1
+            self.rows += 1
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+# Function to pick the Parquet type of a column from the Python types of its values
+# A property can hold values of different types on different nodes, such columns are stored as strings
+def parquet_type(value_types):
+    import pyarrow as pa
+
+    if value_types == {bool}:
+        return pa.bool_()
+    if value_types == {int}:
+        return pa.int64()
+    if value_types and value_types <= {int, float}:
+        return pa.float64()
+    return pa.string()
+
+
+# Writer streaming rows into Parquet files, one row group per batch, starting a new file every rows_per_file rows
+# The column types are taken from the first batch, a column switched to strings by a later batch only changes in the files after the switch
+class ChunkedParquetWriter(ChunkedCsvWriter):
+    extension = "parquet"
+
+    def __init__(self, directory, prefix, columns, rows_per_file=ROWS_PER_FILE):
+        super().__init__(directory, prefix, columns, rows_per_file)
+        # Parquet type and the Python types seen so far of every column
+        self.types = None
+        self.value_types = {column: set() for column in columns}
+
+    def update_types(self, rows):
+        changed = []
+        for column in self.columns:
+            self.value_types[column].update(type(row[column]) for row in rows if row[column] is not None)
+            wanted = parquet_type(self.value_types[column])
+            if self.types is None:
+                continue
+            # A column only changes when a later batch holds values its type cannot store, string columns stay strings
+            if self.types[column] != wanted and self.types[column] != parquet_type(set()):
+                self.types[column] = parquet_type(set())
+                changed.append(column)
+        if self.types is None:
+            self.types = {column: parquet_type(self.value_types[column]) for column in self.columns}
+        return changed
+
+    def to_table(self, rows):
+        import pyarrow as pa
+
+        arrays = []
+        for column in self.columns:
+            values = [row[column] for row in rows]
+            if self.types[column] == pa.string():
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(pa.array(values, type=self.types[column]))
+        return pa.Table.from_arrays(arrays, names=self.columns)
+
+    def write(self, rows):
+        import pyarrow.parquet as pq
+
+        changed = self.update_types(rows)
+        if changed and self.file is not None:
+            # A Parquet file has one schema, so the rows with the changed columns go to a new file
+            print(f"Columns {', '.join(changed)} hold values of different types, storing them as strings from {self.next_filename()} on")
+            self.close()
+        start = 0
+        while start < len(rows):
+            if self.file is None or self.rows_in_file >= self.rows_per_file:
+                self.close()
+                filename = self.next_filename()
+                self.file = pq.ParquetWriter(filename, self.to_table(rows[:0]).schema)
+                self.files.append(filename)
+                self.rows_in_file = 0
+            chunk = rows[start:start + self.rows_per_file - self.rows_in_file]
+            self.file.write_table(self.to_table(chunk))
+            start += len(chunk)
+            self.rows_in_file += len(chunk)
+            self.rows += len(chunk)
+
+
+# Writers by file format
+DATA_WRITERS = {
+    "csv": ChunkedCsvWriter,
+    "parquet": ChunkedParquetWriter,
+}
+
+
+# Function to stream batches of rows into a writer, returning the number of rows and the files written
+def write_rows(row_batches, writer):
+    try:
+        for rows in row_batches:
+            writer.write(rows)
+    finally:
+        writer.close()
+    return writer.rows, writer.files
+
+
+# Function to export the nodes and outgoing relationships of one label
+def export_label_data(driver, label, output_dir, file_format="parquet", batch_size=BATCH_SIZE, rows_per_file=ROWS_PER_FILE):
+    writer_class = DATA_WRITERS[file_format]
+    directory = label_directory(output_dir, label)
+    os.makedirs(directory, exist_ok=True)
+    # The driver pulls one batch of records at a time from the streamed queries
+    with driver.session(fetch_size=batch_size) as session:
+        properties = get_distinct_properties(session, label)
+        node_writer = writer_class(directory, "nodes", [ID_COLUMN] + properties + [OTHER_PROPERTIES_COLUMN], rows_per_file)
+        nodes, node_files = write_rows(iter_node_rows(iter_node_batches(session, label, batch_size), properties), node_writer)
+        print(f"Exported {nodes} nodes of {label}")
+        relationship_writer = writer_class(directory, "relationships", RELATIONSHIP_COLUMNS, rows_per_file)
+        relationships, relationship_files = write_rows(iter_relationship_rows(iter_relationship_batches(session, label, batch_size)), relationship_writer)
+        print(f"Exported {relationships} relationships of {label}")
+    return {
+        "label": label,
+        "properties": properties,
+        "nodes": nodes,
+        "relationships": relationships,
+        "files": node_files + relationship_files,
+    }
+
+
+# Function to export the data of the given labels (all labels by default) and write the export manifest
+def export_data(driver, output_dir, file_format="parquet", labels=None, batch_size=BATCH_SIZE, rows_per_file=ROWS_PER_FILE):
+    if labels is None:
+        with driver.session() as session:
+            labels = get_all_labels(session)
+    print(f"Exporting the data of {len(labels)} labels to {output_dir}...")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = []
+    for label in labels:
+        try:
+            manifest.append(export_label_data(driver, label, output_dir, file_format, batch_size, rows_per_file))
+        except Exception as e:
+            print(f"Error exporting data for {label}: {e}")
+    manifest_file = os.path.join(output_dir, EXPORT_MANIFEST)
+    with open(manifest_file, mode="w", encoding="utf-8") as file:
+        json.dump({"format": file_format, "labels": manifest}, file, indent=2)
+    print(f"Export manifest written to {manifest_file}")
+    return manifest
+
+
+# Function to parse the command line arguments
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the nodes and relationships of a Neo4j database to chunked Parquet or CSV files.")
+    parser.add_argument("--uri", default=os.environ.get("NEO4J_URI", "neo4j://localhost:7687"), help="Neo4j URI")
+    parser.add_argument("--username", default=os.environ.get("NEO4J_USERNAME", "neo4j"), help="Neo4j username")
+    parser.add_argument("--password", default=os.environ.get("NEO4J_PASSWORD"), help="Neo4j password (defaults to $NEO4J_PASSWORD)")
+    parser.add_argument("--output-dir", required=True, help="Directory the data files are written to")
+    parser.add_argument("--format", default="parquet", choices=sorted(DATA_WRITERS), help="File format of the data files")
+    parser.add_argument("--labels", nargs="+", help="Labels to export (defaults to all labels)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Nodes or relationships read per query")
+    parser.add_argument("--rows-per-file", type=int, default=ROWS_PER_FILE, help="Rows written per file")
+    return parser.parse_args()
+
+
+# Main function to export the data of the database
+def main():
+    args = parse_args()
+    driver = create_driver(args.uri, args.username, args.password)
+    try:
+        export_data(driver, args.output_dir, args.format, args.labels, args.batch_size, args.rows_per_file)
+    finally:
+        # Close the Neo4j driver connection
+        driver.close()
+    print("Data export completed.")
+
+
+# Run the main function
+if __name__ == "__main__":
+    main()
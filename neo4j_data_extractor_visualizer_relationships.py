@@ -9,27 +9,26 @@ It retrieves all unique properties associated with that label.
 It fetches incoming and outgoing relationships for that label. Each relationship includes the type of relationship and the connected node’s label(s).
 
 3.Organize and Structure the Data:
-It structures the data into a list, where each entry includes:
+It structures the data into one record per label, where each record includes:
 - The label name.
 - A list of properties for the label.
-- A combined list of incoming and outgoing relationships.
-- Separate lists of incoming and outgoing relationships.
-- This data is then converted into a DataFrame to simulate reading it from a CSV file.
+- Separate lists of incoming and outgoing relationship patterns, each with the relationship type, the connected node's label(s) and the relationship count.
 
 4.Visualize Relationships in Network Graphs:
-- For each label, it creates a directed network graph using NetworkX.
-- Nodes represent labels, and edges represent relationships between labels.
+- For each label, it creates a directed network graph using NetworkX, built directly from the label's relationship patterns.
+- Nodes represent labels (or label combinations such as "A, B" for nodes with several labels), and edges represent relationships between labels.
 - Relationships are displayed with directed arrows showing the direction (incoming or outgoing) relative to the label.
 - Each graph is saved as an image in a specified output directory.
+- One label-level graph of the whole schema is also exported as GraphML, JSON and a self-contained HTML viewer with precomputed layout coordinates.
+- Graphs are rendered in parallel worker processes. A graph that did not change since the last run is not rendered again, and computed layouts are cached on disk.
 """
 
-import csv
-from neo4j import GraphDatabase
-import networkx as nx
-import matplotlib.pyplot as plt
-import os
-import pandas as pd
-from io import StringIO
+import argparse
+
+from neo4j_schema_export import create_driver
+from neo4j_schema_extractor import extract_schema
+from neo4j_schema_graph import SchemaGraphSink
+from neo4j_schema_sinks import GraphImageSink
 
 # Neo4j connection details
 # Replace with actual Neo4j URI 
@@ -39,138 +38,49 @@ username = "your_username_here"
 # Replace with actual password
 password = "your_password_here"  
 
-# Initialize the Neo4j driver
-driver = GraphDatabase.driver(uri, auth=(username, password))
-
-# Function to retrieve all labels in the database
-def get_all_labels():
-    # Opens a session with the Neo4j database and retrieves all unique labels
-    with driver.session() as session:
-        result = session.run("CALL db.labels()")
-        labels = [record["label"] for record in result]
-        return labels
-
-# Function to get distinct properties for a label
-def get_distinct_properties(label_name):
-    # Query to get all distinct properties for a given label
-    query = f"""
-    MATCH (n:`{label_name}`)
-    WITH collect(DISTINCT keys(n)) AS allKeys
-    UNWIND allKeys AS keysList
-    UNWIND keysList AS key
-    RETURN DISTINCT key
-    """
-    with driver.session() as session:
-        result = session.run(query)
-        properties = [record["key"] for record in result]
-        return properties
-
-# Function to get all relationships with connected node labels for a label, separated by direction
-def get_all_relationships(label_name):
-    # Queries to get incoming and outgoing relationships for the label
-    incoming_query = f"""
-    MATCH (a:`{label_name}`)<-[r]-(b)
-    RETURN DISTINCT type(r) AS relationship_name, labels(b) AS connected_labels
-    """
-    outgoing_query = f"""
-    MATCH (a:`{label_name}`)-[r]->(b)
-    RETURN DISTINCT type(r) AS relationship_name, labels(b) AS connected_labels
-    """
-    with driver.session() as session:
-        incoming_result = session.run(incoming_query)
-        outgoing_result = session.run(outgoing_query)
-        
-        # Format relationships to include type and connected labels
-        incoming_relationships = [
-            f"{record['relationship_name']} ({', '.join(record['connected_labels'])})"
-            for record in incoming_result
-        ]
-        outgoing_relationships = [
-            f"{record['relationship_name']} ({', '.join(record['connected_labels'])})"
-            for record in outgoing_result
-        ]
-        
-        return incoming_relationships, outgoing_relationships
-
-# Collect data from Neo4j and prepare for visualization
-data = []
-labels = get_all_labels()
-
-for label in labels:
-    # Get properties and relationships for each label
-    properties = get_distinct_properties(label)
-    incoming_relationships, outgoing_relationships = get_all_relationships(label)
-    all_relationships = incoming_relationships + outgoing_relationships
-    # Append label data to list in a structured format
-    data.append([
-        label,
-        ", ".join(properties),
-        ", ".join(all_relationships),
-        ", ".join(incoming_relationships),
-        ", ".join(outgoing_relationships)
-    ])
-
-# Convert data into a DataFrame to simulate reading from CSV
-csv_data = StringIO()
-csv_writer = csv.writer(csv_data)
-# Write CSV header and data rows
-csv_writer.writerow(["Label", "Properties", "Relationships", "Incoming Relationships", "Outgoing Relationships"])
-csv_writer.writerows(data)
-csv_data.seek(0)  # Reset StringIO pointer to the start for reading
-df = pd.read_csv(csv_data)
-
 # Set the output directory for visualizations
 output_dir = "path_to_your_output_directory"  # Replace with your desired output path
-os.makedirs(output_dir, exist_ok=True)
-
-# Loop over each unique label to create and save a network graph
-unique_labels = df['Label'].unique()
-
-for label in unique_labels:
-    filtered_data = df[df['Label'] == label]
-
-    # Initialize a directed graph for each label's relationships
-    G = nx.DiGraph()
-
-    # Add nodes and edges based on incoming and outgoing relationships
-    for _, row in filtered_data.iterrows():
-        incoming_relationships = row['Incoming Relationships'].split(", ") if pd.notna(row['Incoming Relationships']) else []
-        outgoing_relationships = row['Outgoing Relationships'].split(", ") if pd.notna(row['Outgoing Relationships']) else []
-        
-        # Add edges for incoming relationships
-        for relationship in incoming_relationships:
-            if " (" in relationship:
-                rel_type, source_label = relationship.split(" (")
-                source_label = source_label.rstrip(")")
-                G.add_edge(source_label, label, relationship=rel_type, direction="incoming")
-        
-        # Add edges for outgoing relationships
-        for relationship in outgoing_relationships:
-            if " (" in relationship:
-                rel_type, target_label = relationship.split(" (")
-                target_label = target_label.rstrip(")")
-                G.add_edge(label, target_label, relationship=rel_type, direction="outgoing")
-
-    # Draw the network graph for the current label
-    plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(G, k=1)
-    nx.draw(
-        G,
-        pos,
-        with_labels=True,
-        node_size=5000,
-        node_color="lightcoral",
-        font_size=12,
-        font_weight="bold",
-        arrows=True
-    )
-    plt.title(f"Network Graph of '{label}' Relationships")
-
-    # Save the plot as an image in the output directory
-    output_path = os.path.join(output_dir, f"{label}_network_graph.png")
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved network graph for '{label}' at {output_path}")
-
-# Close the Neo4j driver connection after the script is done
-driver.close()
+# Number of processes rendering graphs in parallel (None to use all CPU cores)
+render_workers = None
+# Set to True to also export the label-level graph of the whole schema as GraphML, JSON and an HTML viewer
+export_schema_graph = True
+
+# Function to parse the command line arguments, the settings above are the defaults
+def parse_args():
+    parser = argparse.ArgumentParser(description="Render a network graph of the relationships of every label in a Neo4j database.")
+    parser.add_argument("--uri", default=uri, help="Neo4j URI")
+    parser.add_argument("--username", default=username, help="Neo4j username")
+    parser.add_argument("--password", default=password, help="Neo4j password")
+    parser.add_argument("--output-dir", default=output_dir, help="Directory the graph images are written to")
+    parser.add_argument("--render-workers", type=int, default=render_workers, help="Number of processes rendering graphs (defaults to all CPU cores)")
+    return parser.parse_args()
+
+# Main function to collect the data from Neo4j and render a network graph per label
+def main():
+    args = parse_args()
+    # The driver is created here rather than at import time, so importing this module never connects
+    driver = create_driver(args.uri, args.username, args.password)
+    try:
+        # Collect data from Neo4j and prepare for visualization
+        # Properties and relationships for all labels are collected in a constant number of bulk queries
+        records = extract_schema(driver)
+    finally:
+        # Close the Neo4j driver connection
+        driver.close()
+
+    # Graphs are rendered on a process pool, unchanged graphs from the last run are skipped
+    # matplotlib and networkx are only imported once the first graph is drawn
+    sinks = [GraphImageSink(args.output_dir, workers=args.render_workers)]
+    if export_schema_graph:
+        sinks.append(SchemaGraphSink(args.output_dir))
+
+    # Loop over each label to create and save a network graph
+    for record in records:
+        for sink in sinks:
+            sink.write(record)
+    for sink in sinks:
+        sink.close()
+
+# Run the main function, the guard also keeps the rendering worker processes from running it
+if __name__ == "__main__":
+    main()
@@ -14,10 +14,18 @@ After extracting the data, it is written to a CSV file with the following column
 - **Relationships**: A combined list of incoming and outgoing relationships.
 - **Incoming Relationships**: Relationships where nodes of this label are the target of the relationship.
 - **Outgoing Relationships**: Relationships where nodes of this label are the source of the relationship.
+- **Property Sampling**: "exact", or the sample size when the properties were discovered from a sample of nodes.
+- **Degraded**: Which parts of the row come from the cheaper fallback queries of a label that ran out of time.
+
+Rows are written to the open CSV file as soon as each label is extracted and flushed periodically, so memory does not grow with the number of labels. A progress line shows the labels per second and the estimated time left; the full records are only logged with --debug.
 """
 
-import csv
-from neo4j import GraphDatabase
+import argparse
+import logging
+
+from neo4j_query_profiler import QueryProfiler
+from neo4j_schema_export import ProgressLine, count_labels, create_driver, iter_records, write_records
+from neo4j_schema_sinks import CSV_HEADER, PROPERTY_STATS_HEADER, StreamingCsvSink
 
 # Neo4j connection details
 
@@ -28,134 +36,83 @@ username = "your_username_here"
 # Replace with actual Neo4j password
 password = "your_password_here"  
 
-# Initialize the Neo4j driver
-driver = GraphDatabase.driver(uri, auth=(username, password))
-
-# Function to retrieve all labels in the database along with node count
-def get_all_labels_with_count():
-    print("Fetching all labels with node counts...")
-    labels_with_counts = []
-    try:
-        with driver.session() as session:
-            # First, get all labels
-            result = session.run("CALL db.labels() YIELD label")
-            labels = [record["label"] for record in result]
-            
-            # For each label, count the nodes
-            for label in labels:
-                count_result = session.run(f"MATCH (n:`{label}`) RETURN count(n) AS count")
-                node_count = count_result.single()["count"]
-                labels_with_counts.append({"label": label, "count": node_count})
-            
-            print(f"Labels with counts: {labels_with_counts}")
-            return labels_with_counts
-    except Exception as e:
-        print(f"Error retrieving labels: {e}")
-        return []
+# CSV file the results are written to
+output_file = "F:/Etolv/Scripts/database.csv"
+# Set to True to extract labels concurrently instead of with bulk queries
+concurrent_extraction = False
+# Maximum number of labels queried at the same time in concurrent mode
+max_in_flight = 8
+# Property keys of labels above exact_threshold nodes are discovered from a sample of sample_size nodes
+# strategy is one of "exact", "first", "random" or "stratified"
+property_sampling = {"strategy": "exact", "sample_size": 10000, "exact_threshold": 1000000}
+# Relationships are discovered with one aggregated pass, or per relationship type with at most
+# max_degree relationships expanded for each of node_sample_size nodes (strategy "by_type")
+relationship_discovery = {"strategy": "aggregated", "node_sample_size": 1000, "max_degree": 100}
+# Set to a JSON file path to only re-extract labels that changed since the last run (None to disable)
+snapshot_file = None
+# File the schema diff against the previous snapshot is written to
+diff_report_file = "F:/Etolv/Scripts/schema_diff.json"
+# Seconds each per-label query may take (None for no limit), a label that runs out of time is retried with
+# a LIMIT-bounded scan of fallback_node_limit nodes and marked as degraded
+label_budget = {"timeout": None, "fallback_node_limit": 10000}
+# Set to a dict to profile the property values of every label (types, fill rate, approximate distinct count,
+# ranges and examples), fetching batch_size nodes at a time and profiling at most max_nodes nodes per label (None for all)
+property_stats = None  # e.g. {"batch_size": 10000, "max_nodes": 100000, "examples": 5}
+# Set to a JSONL file path to journal every label as soon as it is extracted (None to disable)
+checkpoint_file = None
+# Set to True to skip the labels already in the checkpoint journal and rebuild the output from it
+resume = False
+# Set to a JSON file path to record the timing of every query and print the slowest labels (None to disable)
+query_report_file = None
+# Set to True to run every query with PROFILE and record its database hits in the query report
+profile_queries = False
 
-# Function to get distinct properties for a label
-def get_distinct_properties(label_name):
-    print(f"Fetching properties for label: {label_name}")
-    query = f"""
-    MATCH (n:`{label_name}`)
-    WITH collect(DISTINCT keys(n)) AS allKeys
-    UNWIND allKeys AS keysList
-    UNWIND keysList AS key
-    RETURN DISTINCT key
-    """
-    try:
-        with driver.session() as session:
-            result = session.run(query)
-            properties = [record["key"] for record in result]
-            print(f"Properties for {label_name}: {properties}")
-            return properties
-    except Exception as e:
-        print(f"Error retrieving properties for {label_name}: {e}")
-        return []
-
-# Function to get all relationships with connected node labels for a label, separated by direction
-def get_all_relationships(label_name):
-    print(f"Fetching relationships for label: {label_name}")
-    incoming_query = f"""
-    MATCH (a:`{label_name}`)<-[r]-(b)
-    RETURN DISTINCT type(r) AS relationship_name, labels(b) AS connected_labels
-    """
-    outgoing_query = f"""
-    MATCH (a:`{label_name}`)-[r]->(b)
-    RETURN DISTINCT type(r) AS relationship_name, labels(b) AS connected_labels
-    """
-    try:
-        with driver.session() as session:
-            incoming_result = session.run(incoming_query)
-            outgoing_result = session.run(outgoing_query)
-            
-            # Format incoming and outgoing relationships
-            incoming_relationships = [
-                f"{record['relationship_name']} ({', '.join(record['connected_labels'])})"
-                for record in incoming_result
-            ]
-            outgoing_relationships = [
-                f"{record['relationship_name']} ({', '.join(record['connected_labels'])})"
-                for record in outgoing_result
-            ]
-            
-            print(f"Incoming relationships for {label_name}: {incoming_relationships}")
-            print(f"Outgoing relationships for {label_name}: {outgoing_relationships}")
-            
-            return incoming_relationships, outgoing_relationships
-    except Exception as e:
-        print(f"Error retrieving relationships for {label_name}: {e}")
-        return [], []
-
-# Function to write the results to a CSV file
-def write_to_csv(data, filename="F:/Etolv/Scripts/database.csv"):
-    print(f"Writing data to {filename}...")
-    try:
-        with open(filename, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            # Updated header with new columns
-            writer.writerow(["Label", "Node Count", "Properties", "Relationships", "Incoming Relationships", "Outgoing Relationships"])
-            for row in data:
-                print(f"Writing row: {row}")  # Debugging print statement
-                writer.writerow(row)
-        print(f"Data successfully written to {filename}")
-    except Exception as e:
-        print(f"Error writing to CSV: {e}")
+# Function to parse the command line arguments, the settings above are the defaults
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the labels, node counts, properties and relationships of a Neo4j database to CSV.")
+    parser.add_argument("--uri", default=uri, help="Neo4j URI")
+    parser.add_argument("--username", default=username, help="Neo4j username")
+    parser.add_argument("--password", default=password, help="Neo4j password")
+    parser.add_argument("--output", default=output_file, help="CSV file the results are written to")
+    parser.add_argument("--debug", action="store_true", help="Log every extracted record and written row")
+    return parser.parse_args()
 
 # Main function to process all labels and collect their properties/relationships
 def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING, format="%(message)s")
     print("Starting data extraction...")
-    labels_with_counts = get_all_labels_with_count()
-    if not labels_with_counts:
+    # The driver is created here rather than at import time, so importing this module never connects
+    driver = create_driver(args.uri, args.username, args.password)
+    # Every query is timed when a query report is requested
+    profiler = QueryProfiler(profile=profile_queries) if query_report_file else None
+    try:
+        # Extraction yields one record at a time, which is written straight to the open CSV file
+        records = iter_records(
+            profiler.wrap(driver) if profiler else driver,
+            concurrent_extraction=concurrent_extraction,
+            max_in_flight=max_in_flight,
+            sampling=property_sampling,
+            discovery=relationship_discovery,
+            snapshot_file=snapshot_file,
+            diff_report_file=diff_report_file,
+            checkpoint_file=checkpoint_file,
+            resume=resume,
+            budget=label_budget if label_budget.get("timeout") else None,
+            property_stats=property_stats,
+        )
+        sink = StreamingCsvSink(args.output, CSV_HEADER + PROPERTY_STATS_HEADER if property_stats else CSV_HEADER)
+        written = write_records(records, [sink], ProgressLine(count_labels(driver)))
+    finally:
+        # Close the Neo4j driver connection
+        driver.close()
+    if profiler:
+        profiler.write_report(query_report_file)
+    if not written:
         print("No labels found in the database.")
         return
-
-    data = []
-    for label_info in labels_with_counts:
-        label = label_info["label"]
-        node_count = label_info["count"]
-        # Fetch properties for the current label
-        properties = get_distinct_properties(label)
-        # Fetch incoming and outgoing relationships for the current label
-        incoming_relationships, outgoing_relationships = get_all_relationships(label)
-        # Combine all relationships into a single field for the 'Relationships' column
-        all_relationships = incoming_relationships + outgoing_relationships
-        # Prepare the row data to write to CSV
-        data.append([
-            label,
-            node_count,
-            ", ".join(properties),
-            ", ".join(all_relationships),
-            ", ".join(incoming_relationships),
-            ", ".join(outgoing_relationships)
-        ])
-        print(f"Data for {label}: {data[-1]}")
-    # Write collected data to CSV
-    write_to_csv(data)
     print("Data extraction completed.")
 
 # Run the main function
 if __name__ == "__main__":
     main()
-    # Close the Neo4j driver connection
-    driver.close()
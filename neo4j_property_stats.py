@@ -0,0 +1,176 @@
+"""
+This Python module profiles the values of every property key of a label, for capacity planning and index decisions. An exact count(DISTINCT n.prop) over a big label is too expensive, so the nodes of the label are streamed in batches from one query and every key keeps small, mergeable sketches:
+- Types: The number of values of every type (str, int, float, bool, list, ...).
+- Fill Rate: The share of the profiled nodes that have the key.
+- Distinct Count: An approximate distinct count from a HyperLogLog sketch (2^12 registers, about 1.6% standard error).
+- Min / Max: The smallest and largest numeric value.
+- Min Length / Max Length: The shortest and longest string or list value.
+- Examples: A reservoir sample of a few values.
+
+Memory is bounded by the number of keys and the sketch size, not by the size of the label. Reading every node of a label with hundreds of millions of nodes would still take hours, so by default only the first PROPERTY_STATS_MAX_NODES nodes of each label are profiled (one LIMIT-bounded query) and the outputs show the profiled share. The profiling configuration is a dict:
+- batch_size: Nodes fetched from the server at a time
+- max_nodes: Maximum number of nodes profiled per label (defaults to PROPERTY_STATS_MAX_NODES, None for every node)
+- examples: Number of example values kept per key
+"""
+
+import hashlib
+import logging
+import math
+import random
+
+from neo4j_query_profiler import profiled_label
+from neo4j_schema_extractor import NODE_BATCH_SIZE, iter_node_batches
+
+logger = logging.getLogger(__name__)
+
+# Number of index bits of the HyperLogLog sketch, it has 2^HLL_PRECISION registers
+HLL_PRECISION = 12
+# Default number of example values kept per property key
+EXAMPLES = 5
+# Maximum length of an example value
+MAX_EXAMPLE_LENGTH = 100
+# Default maximum number of nodes profiled per label
+PROPERTY_STATS_MAX_NODES = 100000
+
+
+# Sketch estimating the number of distinct values, two sketches can be merged into the sketch of their union
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        # The type name is part of the hash, so 1 and "1" are counted as different values
+        digest = hashlib.blake2b(f"{type(value).__name__}:{value!r}".encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self):
+        registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / registers)
+        estimate = alpha * registers * registers / sum(2.0 ** -register for register in self.registers)
+        empty = self.registers.count(0)
+        # Small cardinalities are estimated more accurately from the number of empty registers
+        if estimate <= 2.5 * registers and empty:
+            estimate = registers * math.log(registers / empty)
+        return round(estimate)
+
+
+# Uniform sample of at most size values from a stream of unknown length
+class Reservoir:
+    def __init__(self, size=EXAMPLES, rng=None):
+        self.size = size
+        self.items = []
+        self.seen = 0
+        self.rng = rng or random.Random(0)
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        index = self.rng.randrange(self.seen)
+        if index < self.size:
+            self.items[index] = item
+
+    def merge(self, other):
+        # Every slot is taken from either reservoir in proportion to the number of values it has seen
+        mine, theirs = list(self.items), list(other.items)
+        items = []
+        while len(items) < self.size and (mine or theirs):
+            if mine and (not theirs or self.rng.random() < self.seen / (self.seen + other.seen)):
+                items.append(mine.pop(self.rng.randrange(len(mine))))
+            else:
+                items.append(theirs.pop(self.rng.randrange(len(theirs))))
+        self.items = items
+        self.seen += other.seen
+
+
+# Sketches of the values of one property key
+class PropertySketch:
+    def __init__(self, examples=EXAMPLES):
+        self.present = 0
+        self.types = {}
+        self.distinct = HyperLogLog()
+        self.examples = Reservoir(examples)
+        self.minimum = None
+        self.maximum = None
+        self.min_length = None
+        self.max_length = None
+
+    def add(self, value):
+        self.present += 1
+        type_name = type(value).__name__
+        self.types[type_name] = self.types.get(type_name, 0) + 1
+        self.distinct.add(value)
+        self.examples.add(str(value)[:MAX_EXAMPLE_LENGTH])
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.minimum = value if self.minimum is None else min(self.minimum, value)
+            self.maximum = value if self.maximum is None else max(self.maximum, value)
+        elif isinstance(value, (str, list)):
+            self.min_length = len(value) if self.min_length is None else min(self.min_length, len(value))
+            self.max_length = len(value) if self.max_length is None else max(self.max_length, len(value))
+
+    def merge(self, other):
+        self.present += other.present
+        for type_name, count in other.types.items():
+            self.types[type_name] = self.types.get(type_name, 0) + count
+        self.distinct.merge(other.distinct)
+        self.examples.merge(other.examples)
+        for attribute, pick in (("minimum", min), ("maximum", max), ("min_length", min), ("max_length", max)):
+            values = [value for value in (getattr(self, attribute), getattr(other, attribute)) if value is not None]
+            setattr(self, attribute, pick(values) if values else None)
+
+    def summary(self, nodes):
+        return {
+            "types": dict(sorted(self.types.items(), key=lambda item: item[1], reverse=True)),
+            "fill_rate": self.present / nodes if nodes else 0.0,
+            # The estimate cannot be larger than the number of values seen
+            "distinct": min(self.distinct.count(), self.present),
+            "min": self.minimum,
+            "max": self.maximum,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+            "examples": self.examples.items,
+        }
+
+
+# Function to profile the property values of a label, returning the statistics per key and the number of profiled nodes
+def get_property_stats(session, label_name, batch_size=NODE_BATCH_SIZE, max_nodes=PROPERTY_STATS_MAX_NODES, examples=EXAMPLES):
+    sketches = {}
+    nodes = 0
+    for batch in iter_node_batches(session, label_name, batch_size, limit=max_nodes):
+        for record in batch:
+            nodes += 1
+            for key, value in record["properties"].items():
+                if key not in sketches:
+                    sketches[key] = PropertySketch(examples)
+                sketches[key].add(value)
+    return {key: sketches[key].summary(nodes) for key in sorted(sketches)}, nodes
+
+
+# Function to add the property statistics to every record, profiling one label at a time
+def iter_with_property_stats(driver, records, property_stats):
+    for record in records:
+        label = record["label"]
+        try:
+            with profiled_label(label), driver.session(fetch_size=property_stats.get("batch_size", NODE_BATCH_SIZE)) as session:
+                record["property_stats"], record["property_stats_nodes"] = get_property_stats(
+                    session,
+                    label,
+                    property_stats.get("batch_size", NODE_BATCH_SIZE),
+                    property_stats.get("max_nodes", PROPERTY_STATS_MAX_NODES),
+                    property_stats.get("examples", EXAMPLES),
+                )
+            # The scripts show a throttled progress line instead of one line per label
+            logger.debug("Property statistics collected for %s (%d of %d nodes)", label, record["property_stats_nodes"], record["count"])
+        except Exception as e:
+            print(f"Error collecting property statistics for {label}: {e}")
+        yield record
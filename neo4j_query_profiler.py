@@ -0,0 +1,234 @@
+"""
+This Python module instruments the queries run by the Neo4j export scripts, to find out which labels and queries cost the most. The driver is wrapped so that every session.run records:
+- Label: The label the query was run for, or "(all labels)" for bulk queries.
+- Wall Time: Seconds from sending the query until the result was fully consumed. Results are streamed through, so this includes the time the caller spends on the rows.
+- Rows: The number of rows returned.
+- Available After / Consumed After: The server timings from the result summary, in milliseconds.
+- DB Hits: The total database hits of the query plan, when PROFILE mode is enabled.
+
+At the end of the run a machine-readable report is written (JSON with every query and the per-label totals, optionally CSV with every query), and a table of the slowest labels is printed.
+"""
+
+import csv
+import functools
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Label recorded for queries that are not run for a single label
+ALL_LABELS = "(all labels)"
+# Default number of labels in the slowest labels table
+TOP_N = 20
+
+# The label the current thread is extracting, set with profiled_label()
+current = threading.local()
+
+
+# Context manager attributing the queries run by the current thread to a label
+@contextmanager
+def profiled_label(label):
+    previous = getattr(current, "label", None)
+    current.label = label
+    try:
+        yield
+    finally:
+        current.label = previous
+
+
+# Function to add up the database hits of a profiled query plan and all of its children
+def count_db_hits(plan):
+    if not plan:
+        return 0
+    children = plan.get("children", []) if isinstance(plan, dict) else getattr(plan, "children", [])
+    db_hits = plan.get("dbHits", 0) if isinstance(plan, dict) else getattr(plan, "db_hits", 0)
+    return (db_hits or 0) + sum(count_db_hits(child) for child in children)
+
+
+# Result of a profiled query, the records are streamed to the caller and counted as they are consumed
+# The query is recorded once the result is exhausted, consumed, or discarded by the next query or the end of the session
+class ProfiledResult:
+    def __init__(self, result, entry, profiler, start, profile):
+        self.result = result
+        self.entry = entry
+        self.profiler = profiler
+        self.start = start
+        self.profile = profile
+        self.summary = None
+        self.finished = False
+
+    def __getattr__(self, name):
+        return getattr(self.result, name)
+
+    def __iter__(self):
+        try:
+            for record in self.result:
+                self.entry["rows"] += 1
+                yield record
+        except Exception as e:
+            self.entry["error"] = str(e)
+            raise
+        finally:
+            self.finish()
+
+    def single(self):
+        records = list(self)
+        return records[0] if records else None
+
+    def consume(self):
+        self.finish()
+        return self.summary
+
+    # Function to read the server timings of the result, the remaining records are discarded
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        try:
+            self.summary = self.result.consume()
+            self.entry["available_after"] = self.summary.result_available_after
+            self.entry["consumed_after"] = self.summary.result_consumed_after
+            if self.profile:
+                self.entry["db_hits"] = count_db_hits(self.summary.profile)
+        except Exception as e:
+            self.entry["error"] = self.entry["error"] or str(e)
+        finally:
+            self.entry["wall_time"] = time.perf_counter() - self.start
+            self.profiler.record(self.entry)
+
+
+# Session wrapper recording every query it runs
+class ProfiledSession:
+    def __init__(self, session, profiler):
+        self.session = session
+        self.profiler = profiler
+        # The last result, a session streams one result at a time
+        self.result = None
+
+    def __enter__(self):
+        self.session.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finish_result()
+        return self.session.__exit__(*exc_info)
+
+    # Function to record the last result before the next query or the end of the session discards it
+    def finish_result(self):
+        if self.result is not None:
+            self.result.finish()
+            self.result = None
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def execute_read(self, work, *args, **kwargs):
+        # The transaction is wrapped as well, so the queries run inside it are recorded
+        # functools.wraps keeps the timeout and metadata set by unit_of_work
+        @functools.wraps(work)
+        def profiled_work(tx, *work_args, **work_kwargs):
+            profiled_tx = ProfiledSession(tx, self.profiler)
+            try:
+                return work(profiled_tx, *work_args, **work_kwargs)
+            finally:
+                profiled_tx.finish_result()
+
+        return self.session.execute_read(profiled_work, *args, **kwargs)
+
+    def run(self, query, parameters=None, **kwargs):
+        # Administration commands such as SHOW INDEXES cannot be profiled
+        profile = self.profiler.profile and not query.lstrip().upper().startswith("SHOW")
+        entry = {
+            "label": getattr(current, "label", None) or ALL_LABELS,
+            "query": re.sub(r"\s+", " ", query).strip(),
+            "wall_time": 0.0,
+            "rows": 0,
+            "available_after": None,
+            "consumed_after": None,
+            "db_hits": None,
+            "error": None,
+        }
+        self.finish_result()
+        start = time.perf_counter()
+        try:
+            result = self.session.run(f"PROFILE {query}" if profile else query, parameters, **kwargs)
+        except Exception as e:
+            entry["error"] = str(e)
+            entry["wall_time"] = time.perf_counter() - start
+            self.profiler.record(entry)
+            raise
+        self.result = ProfiledResult(result, entry, self.profiler, start, profile)
+        return self.result
+
+
+# Driver wrapper handing out profiled sessions, everything else is passed to the real driver
+class ProfiledDriver:
+    def __init__(self, driver, profiler):
+        self.driver = driver
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def session(self, **kwargs):
+        return ProfiledSession(self.driver.session(**kwargs), self.profiler)
+
+
+# Collector of the query timings of a run, shared by all worker threads
+class QueryProfiler:
+    def __init__(self, profile=False):
+        # With profile=True every query runs with PROFILE to capture its database hits
+        self.profile = profile
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def record(self, entry):
+        with self.lock:
+            self.queries.append(entry)
+
+    def wrap(self, driver):
+        return ProfiledDriver(driver, self)
+
+    # Function to add up the queries of every label, slowest label first
+    def label_totals(self):
+        totals = {}
+        for entry in self.queries:
+            total = totals.setdefault(entry["label"], {"label": entry["label"], "queries": 0, "wall_time": 0.0, "rows": 0, "db_hits": 0, "errors": 0})
+            total["queries"] += 1
+            total["wall_time"] += entry["wall_time"]
+            total["rows"] += entry["rows"]
+            total["db_hits"] += entry["db_hits"] or 0
+            total["errors"] += 1 if entry["error"] else 0
+        return sorted(totals.values(), key=lambda total: total["wall_time"], reverse=True)
+
+    # Function to print the slowest labels as a table
+    def print_slowest_labels(self, top_n=TOP_N):
+        labels = [total for total in self.label_totals() if total["label"] != ALL_LABELS][:top_n]
+        print(f"Top {len(labels)} slowest labels:")
+        print(f"{'Label':<40} {'Queries':>8} {'Wall Time (s)':>14} {'Rows':>10} {'DB Hits':>14}")
+        for total in labels:
+            print(f"{total['label'][:40]:<40} {total['queries']:>8} {total['wall_time']:>14.3f} {total['rows']:>10} {total['db_hits']:>14}")
+
+    # Function to write the report as JSON and optionally every query as CSV
+    def write_report(self, json_file, csv_file=None, top_n=TOP_N):
+        report = {
+            "profile": self.profile,
+            "total_queries": len(self.queries),
+            "total_wall_time": sum(entry["wall_time"] for entry in self.queries),
+            "labels": self.label_totals(),
+            "queries": self.queries,
+        }
+        try:
+            with open(json_file, mode="w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+            print(f"Query report written to {json_file}")
+            if csv_file:
+                with open(csv_file, mode="w", newline="", encoding="utf-8") as file:
+                    writer = csv.DictWriter(file, fieldnames=["label", "wall_time", "rows", "available_after", "consumed_after", "db_hits", "error", "query"])
+                    writer.writeheader()
+                    writer.writerows(self.queries)
+                print(f"Query timings written to {csv_file}")
+        except Exception as e:
+            print(f"Error writing query report: {e}")
+        self.print_slowest_labels(top_n)
@@ -0,0 +1,388 @@
+"""
+This Python module benchmarks the schema export without a live Neo4j database, to catch performance regressions before they reach production. It generates a synthetic schema of configurable shape and answers the export's queries from an in-process stand-in for GraphDatabase.driver:
+- Labels: The number of labels, and the share of nodes carrying a second label.
+- Keys: The number of property keys per label.
+- Patterns: The number of relationship patterns per label, spread over a fixed set of relationship types.
+- Supernodes: Labels with ten times the patterns and a thousand times the relationships of a regular label.
+
+Every stage of the export runs against the fake driver:
+- get_all_labels
+- get_distinct_properties (for every label)
+- get_all_relationships (for every label)
+- extract_schema (the bulk queries, kept as a list of records)
+- legacy_records (the same bulk queries, kept as the records of the bulk extraction before the schema model: per-label pattern dicts plus formatted relationship strings)
+- schema_model (the same bulk queries, kept as the compact schema model the records are created from)
+- write_to_csv
+- write_to_excel
+- visualizer (the network graph loop for the first --rendered-labels labels, rendered in this process so its memory is measured)
+- cold_start (a fresh interpreter running the CSV export script with --help, which must stay below COLD_START_TARGET seconds)
+
+For each stage the number of queries, the wall time and the peak Python memory (tracemalloc) are reported. The results can be saved as a baseline, and later runs compared against it: a stage that runs more queries, or whose wall time or peak memory grew by more than the tolerance, is reported as a regression and the benchmark exits with status 1.
+
+Example:
+    python neo4j_schema_benchmark.py --labels 500 --supernodes 10 --save-baseline benchmark_baseline.json
+    python neo4j_schema_benchmark.py --labels 500 --supernodes 10 --baseline benchmark_baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from neo4j_schema_extractor import (
+    add_pattern,
+    build_schema_model,
+    extract_schema,
+    format_patterns,
+    get_all_labels,
+    get_all_relationships,
+    get_distinct_properties,
+    get_label_counts,
+    get_label_properties,
+    get_relationship_rows,
+)
+from neo4j_schema_sinks import GraphImageSink, csv_row, excel_row, write_to_csv, write_to_excel
+
+# Default shape of the synthetic schema
+DEFAULT_SHAPE = {
+    "labels": 100,
+    "keys_per_label": 20,
+    "patterns_per_label": 10,
+    "relationship_types": 20,
+    "supernodes": 2,
+    "multi_label_share": 0.1,
+    "seed": 42,
+    # Rendering dominates the run time, so the visualizer stage only draws the graphs of the first labels (0 for all)
+    "rendered_labels": 20,
+}
+# Stages of the export in the order they are benchmarked
+STAGES = ["get_all_labels", "get_distinct_properties", "get_all_relationships", "extract_schema", "legacy_records", "schema_model", "write_to_csv", "write_to_excel", "visualizer", "cold_start"]
+# Relative growth of wall time or peak memory allowed before a stage is reported as a regression
+DEFAULT_TOLERANCE = 0.25
+# Seconds the CSV export script may take to start, the driver and the plotting and Excel libraries are only imported when needed
+COLD_START_TARGET = 0.25
+# Number of cold starts measured, the fastest one is reported
+COLD_START_RUNS = 5
+# Wall times below this many seconds are too noisy to be compared against the baseline
+MIN_COMPARED_WALL_TIME = 0.05
+
+
+# Function to generate a synthetic schema with labels, node counts, property keys and relationship patterns
+def generate_schema(shape):
+    rng = random.Random(shape["seed"])
+    labels = [f"Label{i:05d}" for i in range(shape["labels"])]
+    relationship_types = [f"REL_{i:03d}" for i in range(shape["relationship_types"])]
+    supernodes = set(labels[:shape["supernodes"]])
+    schema = {"labels": labels, "relationship_types": relationship_types, "counts": {}, "keys": {}, "patterns": []}
+    for label in labels:
+        schema["counts"][label] = rng.randint(1000, 1000000)
+        schema["keys"][label] = [f"{label.lower()}_key_{i}" for i in range(shape["keys_per_label"])]
+    for label in labels:
+        scale = 10 if label in supernodes else 1
+        for _ in range(shape["patterns_per_label"] * scale):
+            target_labels = [rng.choice(labels)]
+            if rng.random() < shape["multi_label_share"]:
+                # Nodes with a second label produce patterns with label combinations such as "A, B"
+                target_labels.append(rng.choice(labels))
+            count = rng.randint(1, 100000) * (1000 if label in supernodes else 1)
+            schema["patterns"].append((label, rng.choice(relationship_types), tuple(sorted(set(target_labels))), count))
+    return schema
+
+
+# Result of a fake query, offering the parts of the neo4j Result the export uses
+class FakeResult(list):
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return FakeSummary()
+
+
+# Summary of a fake query, with the server timings of the neo4j ResultSummary
+class FakeSummary:
+    result_available_after = 0
+    result_consumed_after = 0
+    profile = None
+
+
+# Session answering the export's queries from the synthetic schema
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        self.driver.count_query()
+        schema = self.driver.schema
+        match = re.search(r"\(\w+:`([^`]+)`\)", query)
+        label = match.group(1) if match else None
+        if "db.labels()" in query:
+            return FakeResult({"label": label} for label in schema["labels"])
+        if "db.relationshipTypes()" in query:
+            return FakeResult({"relationshipType": relationship_type} for relationship_type in schema["relationship_types"])
+        if "GRAPH COUNTS" in query and "data.nodes" in query:
+            return FakeResult([{"nodes": [{"count": sum(schema["counts"].values())}] + [{"label": label, "count": count} for label, count in schema["counts"].items()]}])
+        if "GRAPH COUNTS" in query and "data.relationships" in query:
+            return FakeResult([{"relationships": self.driver.relationship_counts}])
+        if "db.schema.nodeTypeProperties()" in query:
+            return FakeResult({"nodeLabels": [label], "propertyName": key} for label, keys in schema["keys"].items() for key in keys)
+        if "source_labels" in query:
+            return FakeResult(
+                {"source_labels": [source], "relationship_name": relationship_type, "target_labels": list(targets), "relationship_count": count}
+                for source, relationship_type, targets, count in schema["patterns"]
+            )
+        if "RETURN DISTINCT key" in query:
+            return FakeResult({"key": key} for key in schema["keys"].get(label, []))
+        if "sampled_nodes" in query:
+            return FakeResult([{"sampled_nodes": min(schema["counts"].get(label, 0), 10000), "keys": schema["keys"].get(label, [])}])
+        if "relationship_count" in query:
+            direction = "incoming" if "<-[r]-" in query else "outgoing"
+            return FakeResult(
+                {"relationship_name": relationship_type, "connected_labels": list(connected), "relationship_count": count}
+                for relationship_type, connected, count in self.driver.patterns[direction].get(label, [])
+            )
+        if query.lstrip().startswith("SHOW"):
+            return FakeResult()
+        raise ValueError(f"Query not supported by the benchmark driver: {query}")
+
+
+# In-process stand-in for GraphDatabase.driver, counting the queries it answers
+class FakeDriver:
+    def __init__(self, schema):
+        self.schema = schema
+        self.query_count = 0
+        self.lock = threading.Lock()
+        # Patterns indexed by label and direction, so the per-label queries are answered without a scan
+        self.patterns = {"incoming": {}, "outgoing": {}}
+        type_counts = {}
+        for source, relationship_type, targets, count in schema["patterns"]:
+            self.patterns["outgoing"].setdefault(source, []).append((relationship_type, targets, count))
+            type_counts[("startLabel", source, relationship_type)] = type_counts.get(("startLabel", source, relationship_type), 0) + count
+            for target in targets:
+                self.patterns["incoming"].setdefault(target, []).append((relationship_type, (source,), count))
+                type_counts[("endLabel", target, relationship_type)] = type_counts.get(("endLabel", target, relationship_type), 0) + count
+        self.relationship_counts = [
+            {side: label, "relationshipType": relationship_type, "count": count}
+            for (side, label, relationship_type), count in type_counts.items()
+        ]
+
+    def count_query(self):
+        with self.lock:
+            self.query_count += 1
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+    def close(self):
+        pass
+
+
+# Function to run one stage, measuring its queries, wall time and peak Python memory
+def measure_stage(name, driver, function):
+    queries = driver.query_count
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        # The export prints every row, which would measure the console instead of the export
+        with open(os.devnull, mode="w") as devnull, redirect_stdout(devnull):
+            result = function()
+        error = None
+    except Exception as e:
+        result = None
+        error = str(e)
+    wall_time = time.perf_counter() - start
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {
+        "stage": name,
+        "queries": driver.query_count - queries,
+        "wall_time": wall_time,
+        "peak_memory": peak_memory,
+        "error": error,
+    }
+
+
+# Function to measure the cold start of the CSV export script in a fresh interpreter
+# The memory of the child process is not traced, so its peak memory is reported as 0
+def measure_cold_start(runs=COLD_START_RUNS):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "neo4j_export_labels_properties_relationships.py")
+    wall_times = []
+    error = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, script, "--help"], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        wall_times.append(time.perf_counter() - start)
+        if result.returncode:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit status {result.returncode}"
+    return {"stage": "cold_start", "queries": 0, "wall_time": min(wall_times), "peak_memory": 0, "error": error}
+
+
+# Function to build the records the way the bulk extraction kept them before the schema model, as the reference for its memory use
+# Every pattern is copied into a dict for each label of its source and target nodes, and formatted as a string next to it
+def extract_legacy_records(driver):
+    with driver.session() as session:
+        labels = get_all_labels(session)
+        counts = get_label_counts(session, labels)
+        properties = get_label_properties(session, labels)
+        incoming = {label: {} for label in labels}
+        outgoing = {label: {} for label in labels}
+        for source_labels, relationship_name, target_labels, count in get_relationship_rows(session):
+            for label in source_labels:
+                add_pattern(outgoing.setdefault(label, {}), relationship_name, target_labels, count)
+            for label in target_labels:
+                add_pattern(incoming.setdefault(label, {}), relationship_name, source_labels, count)
+    records = []
+    for label in labels:
+        incoming_patterns = list(incoming[label].values())
+        outgoing_patterns = list(outgoing[label].values())
+        records.append({
+            "label": label,
+            "count": counts.get(label, 0),
+            "properties": properties.get(label, []),
+            "incoming_relationships": format_patterns(incoming_patterns),
+            "outgoing_relationships": format_patterns(outgoing_patterns),
+            "incoming_patterns": incoming_patterns,
+            "outgoing_patterns": outgoing_patterns,
+            "properties_exact": True,
+            "properties_sample_size": counts.get(label, 0),
+            "complete": True,
+            "degraded": [],
+        })
+    return records
+
+
+# Function to run the visualizer loop, rendering every graph in this process
+def run_visualizer(records, output_dir, rendered_labels=0):
+    sink = GraphImageSink(output_dir, workers=1)
+    for record in records[:rendered_labels or None]:
+        sink.write(record)
+    sink.close()
+
+
+# Function to run every stage of the export against a synthetic schema of the given shape
+def run_benchmark(shape, stages=None):
+    stages = stages or STAGES
+    driver = FakeDriver(generate_schema(shape))
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        session = driver.session()
+        # The labels and the bulk records feed the other stages, so they are always extracted
+        labels, labels_stats = measure_stage("get_all_labels", driver, lambda: get_all_labels(session))
+        records, schema_stats = measure_stage("extract_schema", driver, lambda: extract_schema(driver))
+        stage_functions = {
+            "get_distinct_properties": lambda: [get_distinct_properties(session, label) for label in labels],
+            "get_all_relationships": lambda: [get_all_relationships(session, label) for label in labels],
+            "legacy_records": lambda: extract_legacy_records(driver),
+            "schema_model": lambda: build_schema_model(driver),
+            "write_to_csv": lambda: write_to_csv([csv_row(record) for record in records], os.path.join(output_dir, "benchmark.csv")),
+            "write_to_excel": lambda: write_to_excel([excel_row(record) for record in records], os.path.join(output_dir, "benchmark.xlsx")),
+            "visualizer": lambda: run_visualizer(records, os.path.join(output_dir, "graphs"), shape["rendered_labels"]),
+        }
+        for stage in stages:
+            if stage == "get_all_labels":
+                results.append(labels_stats)
+            elif stage == "extract_schema":
+                results.append(schema_stats)
+            elif stage == "cold_start":
+                results.append(measure_cold_start())
+            else:
+                results.append(measure_stage(stage, driver, stage_functions[stage])[1])
+    return {"shape": shape, "stages": results}
+
+
+# Function to compare the results against a baseline, returning the regressions found
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    if baseline.get("shape") != results["shape"]:
+        print("The baseline was recorded with another schema shape, skipping the comparison")
+        return []
+    baseline_stages = {stats["stage"]: stats for stats in baseline.get("stages", [])}
+    regressions = []
+    for stats in results["stages"]:
+        if stats["stage"] == "cold_start" and stats["wall_time"] > COLD_START_TARGET:
+            regressions.append(f"cold_start: {stats['wall_time']:.3f} s (target {COLD_START_TARGET:.3f} s)")
+        previous = baseline_stages.get(stats["stage"])
+        if not previous:
+            continue
+        if stats["error"] and not previous["error"]:
+            regressions.append(f"{stats['stage']}: failed ({stats['error']})")
+        # The fake driver is deterministic, so any additional query is a regression
+        if stats["queries"] > previous["queries"]:
+            regressions.append(f"{stats['stage']}: {stats['queries']} queries (baseline {previous['queries']})")
+        if stats["wall_time"] > max(previous["wall_time"], MIN_COMPARED_WALL_TIME) * (1 + tolerance):
+            regressions.append(f"{stats['stage']}: {stats['wall_time']:.3f} s (baseline {previous['wall_time']:.3f} s)")
+        if stats["peak_memory"] > previous["peak_memory"] * (1 + tolerance):
+            regressions.append(f"{stats['stage']}: {stats['peak_memory'] / 1e6:.1f} MB peak memory (baseline {previous['peak_memory'] / 1e6:.1f} MB)")
+    return regressions
+
+
+# Function to print the results of every stage as a table
+def print_results(results):
+    shape = ", ".join(f"{key}={value}" for key, value in results["shape"].items())
+    print(f"Synthetic schema: {shape}")
+    print(f"{'Stage':<26} {'Queries':>8} {'Wall Time (s)':>14} {'Peak Memory (MB)':>17}")
+    for stats in results["stages"]:
+        error = f"  error: {stats['error']}" if stats["error"] else ""
+        print(f"{stats['stage']:<26} {stats['queries']:>8} {stats['wall_time']:>14.3f} {stats['peak_memory'] / 1e6:>17.1f}{error}")
+
+
+# Function to parse the command line arguments
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the schema export against a synthetic schema, without a live Neo4j database.")
+    parser.add_argument("--labels", type=int, default=DEFAULT_SHAPE["labels"], help="Number of labels")
+    parser.add_argument("--keys-per-label", type=int, default=DEFAULT_SHAPE["keys_per_label"], help="Number of property keys per label")
+    parser.add_argument("--patterns-per-label", type=int, default=DEFAULT_SHAPE["patterns_per_label"], help="Number of outgoing relationship patterns per label")
+    parser.add_argument("--relationship-types", type=int, default=DEFAULT_SHAPE["relationship_types"], help="Number of relationship types")
+    parser.add_argument("--supernodes", type=int, default=DEFAULT_SHAPE["supernodes"], help="Number of labels with ten times the patterns and relationships")
+    parser.add_argument("--multi-label-share", type=float, default=DEFAULT_SHAPE["multi_label_share"], help="Share of relationship targets with a second label")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SHAPE["seed"], help="Random seed of the synthetic schema")
+    parser.add_argument("--rendered-labels", type=int, default=DEFAULT_SHAPE["rendered_labels"], help="Number of labels drawn by the visualizer stage (0 for all)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run")
+    parser.add_argument("--baseline", help="Compare the results against this baseline file")
+    parser.add_argument("--save-baseline", help="Save the results as a baseline to this file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Relative growth of wall time or peak memory allowed")
+    return parser.parse_args()
+
+
+# Main function to run the benchmark and compare it against the baseline
+def main():
+    args = parse_args()
+    shape = {key: getattr(args, key) for key in DEFAULT_SHAPE}
+    results = run_benchmark(shape, [stage for stage in STAGES if stage in args.stages])
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, mode="w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.baseline}:")
+            for regression in regressions:
+                print(f"- {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+# Run the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+This Python module makes long-running extractions resumable. Every record is appended to a checkpoint journal as soon as its label is extracted, before it is handed to the outputs, so a dropped connection or a killed process only loses the labels that were still in flight.
+
+The journal is a JSON Lines file:
+- The first line holds the journal version and the sampling and relationship discovery settings of the run.
+- Every following line holds the record of one extracted label, flushed to disk before the next label is written.
+
+A checkpointed run always extracts per label, on the bounded worker pool, instead of with the bulk queries, which only return a result once the whole schema is read. When a run is resumed, the labels with a complete (and not degraded) record in the journal are not queried again. Only the remaining labels are extracted and appended to the journal, and the outputs are rebuilt from the journal and the newly extracted records, merged in label order. A journal written with other sampling or relationship discovery settings is ignored.
+
+With a schema snapshot, a fresh run is the incremental extraction instead (records_factory), whose records are only journaled once it finishes.
+"""
+
+import json
+import os
+from heapq import merge
+
+from neo4j_schema_extractor import (
+    MAX_IN_FLIGHT,
+    get_all_labels,
+    get_all_relationship_types,
+    get_label_counts,
+    get_relationship_type_counts,
+    is_discovery_by_type,
+    iter_labels_concurrently,
+)
+
+# Version of the journal file format, journals with another version are ignored
+JOURNAL_VERSION = 1
+
+
+# Function to load the complete records of a journal written with the same settings, keyed by label
+def load_journal(filename, settings):
+    if not os.path.exists(filename):
+        return {}
+    records = {}
+    try:
+        with open(filename, encoding="utf-8") as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("version") != JOURNAL_VERSION or header.get("settings") != settings:
+                print(f"Ignoring checkpoint journal {filename} written with other settings")
+                return {}
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line is cut off when the process was killed while writing it
+                    continue
+                # Incomplete and degraded labels are extracted again
+                if record.get("complete", True) and not record.get("degraded"):
+                    records[record["label"]] = record
+    except Exception as e:
+        print(f"Error reading checkpoint journal {filename}: {e}")
+        return {}
+    return records
+
+
+# Journal appending every record to disk as soon as it is extracted
+class CheckpointJournal:
+    def __init__(self, filename, settings, append=False):
+        self.filename = filename
+        if append:
+            self.file = open(filename, mode="a", encoding="utf-8")
+            # Start on a new line when the last record was cut off
+            if self.file.tell() and not self.ends_with_newline():
+                self.file.write("\n")
+        else:
+            self.file = open(filename, mode="w", encoding="utf-8")
+            self.append_line({"version": JOURNAL_VERSION, "settings": settings})
+
+    def ends_with_newline(self):
+        with open(self.filename, mode="rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def append_line(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def write(self, record):
+        self.append_line(record)
+
+    def close(self):
+        self.file.close()
+
+
+# Function to journal every record before it is yielded
+def journaled(journal, records):
+    for record in records:
+        journal.write(record)
+        yield record
+
+
+# Function to yield the records of a run while journaling them, resuming from the journal when requested
+# records_factory, when given, returns the records of a fresh run instead of the per-label extraction, it is only called when nothing can be resumed
+# enrich, when given, is applied to the records of the per-label extraction before they are journaled
+def iter_checkpointed_records(driver, journal_filename, records_factory=None, resume=False, max_in_flight=MAX_IN_FLIGHT, sampling=None, discovery=None,
+                              budget=None, enrich=None):
+    settings = {"sampling": sampling, "discovery": discovery}
+    completed = load_journal(journal_filename, settings) if resume else {}
+    if resume and not completed:
+        print(f"Nothing to resume from {journal_filename}, extracting every label")
+    journal = CheckpointJournal(journal_filename, settings, append=bool(completed))
+    try:
+        if records_factory and not completed:
+            for record in records_factory():
+                journal.write(record)
+                yield record
+            return
+
+        try:
+            with driver.session() as session:
+                labels = get_all_labels(session)
+                counts = get_label_counts(session, labels)
+                type_counts = None
+                if is_discovery_by_type(discovery):
+                    type_counts = get_relationship_type_counts(session, labels, get_all_relationship_types(session))
+        except Exception as e:
+            print(f"Error retrieving labels: {e}")
+            raise
+
+        remaining = [label for label in labels if label not in completed]
+        if completed:
+            print(f"Resuming from {journal_filename}: {len(labels) - len(remaining)} labels already extracted, {len(remaining)} remaining")
+        # Every record is journaled as soon as its label is extracted, so a killed run only loses the labels in flight
+        # Labels removed from the database since the journal was written are left out
+        resumed = [completed[label] for label in sorted(labels) if label in completed]
+        records = iter_labels_concurrently(driver, remaining, counts, max_in_flight, sampling, discovery, type_counts, budget)
+        # Both sides are in label order, so the journaled and the new records are merged into one label-sorted stream
+        yield from merge(resumed, journaled(journal, enrich(records) if enrich else records), key=lambda record: record["label"])
+    finally:
+        journal.close()
@@ -0,0 +1,258 @@
+"""
+This Python script is the single entry point for exporting the structure of a Neo4j database. The schema is extracted once into an in-memory list of records (labels, node counts, properties and relationships) and then written to every selected output in the same run:
+- --csv: A CSV file with one row per label.
+- --xlsx: An Excel file with one sheet per label (with --stream-xlsx each sheet is written as soon as its label is extracted).
+- --png: A directory with one network graph image per label.
+- --schema-graph: A directory with the label-level graph of the whole schema as GraphML, JSON and an HTML viewer.
+
+Producing all three outputs therefore only queries the database once. With --checkpoint every label is journaled as soon as it is extracted, and --resume continues an interrupted run from the journal. With --query-report the timing of every query is recorded and the slowest labels are printed at the end (--profile also records the database hits of every query).
+
+Example:
+    python neo4j_schema_export.py --uri neo4j://localhost:7687 --username neo4j --csv database.csv --xlsx database.xlsx --png graphs
+"""
+
+import argparse
+import logging
+import os
+import time
+
+from neo4j_property_stats import PROPERTY_STATS_MAX_NODES, iter_with_property_stats
+from neo4j_query_profiler import QueryProfiler
+from neo4j_schema_checkpoint import iter_checkpointed_records
+from neo4j_schema_extractor import FALLBACK_NODE_LIMIT, MAX_IN_FLIGHT, extract_schema, get_all_labels, extract_schema_concurrently, iter_schema, iter_schema_concurrently
+from neo4j_schema_graph import SchemaGraphSink
+from neo4j_schema_sinks import CSV_HEADER, PROPERTY_STATS_HEADER, SINKS, GraphImageSink, StreamingCsvSink, StreamingExcelSink
+from neo4j_schema_snapshot import extract_schema_incrementally
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between two updates of the progress line
+PROGRESS_INTERVAL = 1.0
+
+
+# Function to create the Neo4j driver, the driver package is only imported once a connection is needed
+def create_driver(uri, username, password, **options):
+    from neo4j import GraphDatabase
+
+    return GraphDatabase.driver(uri, auth=(username, password), **options)
+
+
+# Function to extract the schema records with the selected extraction mode
+def extract_records(driver, concurrent_extraction=False, max_in_flight=MAX_IN_FLIGHT, sampling=None, discovery=None,
+                    snapshot_file=None, diff_report_file=None, checkpoint_file=None, resume=False, budget=None, property_stats=None):
+    if checkpoint_file or property_stats:
+        records = list(iter_records(
+            driver, concurrent_extraction, max_in_flight, sampling, discovery, snapshot_file, diff_report_file, checkpoint_file, resume, budget,
+            property_stats
+        ))
+        records.sort(key=lambda record: record["label"])
+        return records
+    if snapshot_file:
+        # Reuse the snapshot for labels whose count-store sizes, relationship types and indexes did not change
+        return extract_schema_incrementally(
+            driver, snapshot_file, diff_report_file, sampling=sampling, discovery=discovery, max_in_flight=max_in_flight, budget=budget
+        )
+    if concurrent_extraction:
+        # Per-label queries run on a bounded worker pool, results come back sorted by label
+        return extract_schema_concurrently(driver, max_in_flight=max_in_flight, sampling=sampling, discovery=discovery, budget=budget)
+    # Collect node counts, properties and relationships for all labels in a constant number of bulk queries
+    return extract_schema(driver, sampling=sampling, discovery=discovery, budget=budget)
+
+
+# Function to yield the schema records with the selected extraction mode
+# In concurrent mode every record is yielded in label order as soon as the labels before it are extracted
+# In bulk mode the records are created from the schema model one at a time, so only the record being written is held as a dict
+def iter_records(driver, concurrent_extraction=False, max_in_flight=MAX_IN_FLIGHT, sampling=None, discovery=None,
+                 snapshot_file=None, diff_report_file=None, checkpoint_file=None, resume=False, budget=None, property_stats=None):
+    # The property values of every label are profiled after its schema is extracted
+    enrich = (lambda records: iter_with_property_stats(driver, records, property_stats)) if property_stats else None
+    if checkpoint_file:
+        # Every record is journaled as soon as it is extracted, a resumed run only extracts the remaining labels
+        # Without a snapshot the labels are extracted one at a time on the worker pool, with a snapshot the incremental extraction is reused
+        records_factory = None
+        if snapshot_file:
+            records_factory = lambda: iter_records(
+                driver, concurrent_extraction, max_in_flight, sampling, discovery, snapshot_file, diff_report_file, budget=budget,
+                property_stats=property_stats
+            )
+        yield from iter_checkpointed_records(driver, checkpoint_file, records_factory, resume, max_in_flight, sampling, discovery, budget, enrich)
+        return
+    if concurrent_extraction and not snapshot_file:
+        records = iter_schema_concurrently(driver, max_in_flight=max_in_flight, sampling=sampling, discovery=discovery, budget=budget)
+    elif not snapshot_file:
+        records = iter_schema(driver, sampling=sampling, discovery=discovery, budget=budget)
+    else:
+        records = extract_records(driver, False, max_in_flight, sampling, discovery, snapshot_file, diff_report_file, budget=budget)
+    yield from enrich(records) if enrich else records
+
+
+# Function to format a number of seconds for the progress line, e.g. "1h 02m 05s"
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+# Progress line rewritten in place with the number of labels done, the labels per second and the estimated time left
+# It is updated at most once per interval, so printing costs nothing next to the extraction
+class ProgressLine:
+    def __init__(self, total=None, interval=PROGRESS_INTERVAL):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last_update = 0.0
+        self.width = 0
+
+    def update(self, count=1):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.last_update >= self.interval or self.done == self.total:
+            self.last_update = now
+            self.print_line(now)
+
+    def print_line(self, now):
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        line = f"Extracted {self.done}/{self.total} labels" if self.total else f"Extracted {self.done} labels"
+        line += f" ({rate:.1f} labels/s"
+        if self.total and rate:
+            line += f", ETA {format_duration(max(self.total - self.done, 0) / rate)}"
+        line += ")"
+        # Padded to the previous line, so a shorter line does not leave characters of the last one behind
+        print(f"\r{line.ljust(self.width)}", end="", flush=True)
+        self.width = len(line)
+
+    def close(self):
+        if self.done:
+            self.print_line(time.perf_counter())
+            print()
+
+
+# Function to count the labels of the database, so the progress line can show the estimated time left
+def count_labels(driver):
+    try:
+        with driver.session() as session:
+            return len(get_all_labels(session))
+    except Exception as e:
+        print(f"Error counting labels: {e}")
+        return None
+
+
+# Function to write the records to every sink, one label at a time, returning the number of records written
+def write_records(records, sinks, progress=None):
+    written = 0
+    for record in records:
+        written += 1
+        logger.debug("Record for %s: %s", record["label"], record)
+        for sink in sinks:
+            try:
+                sink.write(record)
+            except Exception as e:
+                print(f"Error writing {record['label']} to {type(sink).__name__}: {e}")
+        if progress:
+            progress.update()
+    if progress:
+        progress.close()
+    for sink in sinks:
+        sink.close()
+    return written
+
+
+# Function to parse the command line arguments
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract the Neo4j schema once and write it to CSV, Excel and graph images.")
+    parser.add_argument("--uri", default=os.environ.get("NEO4J_URI", "neo4j://localhost:7687"), help="Neo4j URI")
+    parser.add_argument("--username", default=os.environ.get("NEO4J_USERNAME", "neo4j"), help="Neo4j username")
+    parser.add_argument("--password", default=os.environ.get("NEO4J_PASSWORD"), help="Neo4j password (defaults to $NEO4J_PASSWORD)")
+    parser.add_argument("--csv", help="Write the CSV export to this file")
+    parser.add_argument("--xlsx", help="Write the Excel export to this file")
+    parser.add_argument("--png", help="Write one network graph image per label to this directory")
+    parser.add_argument("--schema-graph", help="Write the label-level graph of the whole schema (GraphML, JSON, HTML) to this directory")
+    parser.add_argument("--render-workers", type=int, help="Number of processes rendering graph images (defaults to all CPU cores)")
+    parser.add_argument("--stream-xlsx", action="store_true", help="Write each Excel sheet as soon as its label is extracted, using a write-only workbook")
+    parser.add_argument("--concurrent", action="store_true", help="Extract labels concurrently instead of with bulk queries")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="Maximum number of labels queried at the same time")
+    parser.add_argument("--sampling", default="exact", choices=["exact", "first", "random", "stratified"], help="Property sampling strategy")
+    parser.add_argument("--sample-size", type=int, default=10000, help="Nodes sampled per label for property discovery")
+    parser.add_argument("--exact-threshold", type=int, default=1000000, help="Labels with at most this many nodes are read exactly")
+    parser.add_argument("--discovery", default="aggregated", choices=["aggregated", "by_type"], help="Relationship discovery strategy")
+    parser.add_argument("--timeout", type=float, help="Seconds each query may take: a bulk query falls back to per-label queries, a per-label query to a LIMIT-bounded scan")
+    parser.add_argument("--fallback-node-limit", type=int, default=FALLBACK_NODE_LIMIT, help="Nodes read by the fallback scan of a label that ran out of time")
+    parser.add_argument("--property-stats", action="store_true", help="Profile the property values of every label (types, fill rate, distinct count, ranges)")
+    parser.add_argument("--stats-max-nodes", type=int, default=PROPERTY_STATS_MAX_NODES, help="Maximum number of nodes profiled per label (0 for every node)")
+    parser.add_argument("--snapshot", help="Snapshot file for incremental extraction")
+    parser.add_argument("--diff-report", help="File the schema diff against the snapshot is written to")
+    parser.add_argument("--checkpoint", help="Journal every extracted label to this file, so an interrupted run can be resumed")
+    parser.add_argument("--resume", action="store_true", help="Skip the labels already in the --checkpoint journal and rebuild the outputs from it")
+    parser.add_argument("--query-report", help="Record the timing of every query and write the report as JSON to this file")
+    parser.add_argument("--query-report-csv", help="Also write the timing of every query as CSV to this file")
+    parser.add_argument("--profile", action="store_true", help="Run every query with PROFILE to record its database hits")
+    parser.add_argument("--debug", action="store_true", help="Log every extracted record and written row")
+    return parser.parse_args()
+
+
+# Main function to extract the schema once and write it to every selected output
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING, format="%(message)s")
+    outputs = {output: getattr(args, output) for output in SINKS if getattr(args, output)}
+    if not outputs and not args.schema_graph:
+        print("No output selected, use --csv, --xlsx, --png and/or --schema-graph.")
+        return
+    if args.resume and not args.checkpoint:
+        print("--resume needs the --checkpoint journal to resume from.")
+        return
+
+    sinks = []
+    for output, target in outputs.items():
+        if output == "png":
+            sinks.append(GraphImageSink(target, workers=args.render_workers))
+            continue
+        if output == "csv":
+            # Rows are written as soon as each label is extracted
+            sinks.append(StreamingCsvSink(target, CSV_HEADER + PROPERTY_STATS_HEADER if args.property_stats else CSV_HEADER))
+            continue
+        sink_class = StreamingExcelSink if output == "xlsx" and args.stream_xlsx else SINKS[output]
+        sinks.append(sink_class(target))
+    if args.schema_graph:
+        sinks.append(SchemaGraphSink(args.schema_graph))
+
+    driver = create_driver(args.uri, args.username, args.password)
+    # Every query is timed when a query report is requested
+    profiler = QueryProfiler(profile=args.profile) if args.query_report else None
+    try:
+        print("Starting data extraction...")
+        # Records are handed to the sinks while the extraction is still running
+        records = iter_records(
+            profiler.wrap(driver) if profiler else driver,
+            concurrent_extraction=args.concurrent,
+            max_in_flight=args.max_in_flight,
+            sampling={"strategy": args.sampling, "sample_size": args.sample_size, "exact_threshold": args.exact_threshold},
+            discovery={"strategy": args.discovery, "node_sample_size": 1000, "max_degree": 100},
+            snapshot_file=args.snapshot,
+            diff_report_file=args.diff_report,
+            checkpoint_file=args.checkpoint,
+            resume=args.resume,
+            budget={"timeout": args.timeout, "fallback_node_limit": args.fallback_node_limit} if args.timeout else None,
+            property_stats={"max_nodes": args.stats_max_nodes or None} if args.property_stats else None,
+        )
+        written = write_records(records, sinks, ProgressLine(count_labels(driver)))
+    finally:
+        # Close the Neo4j driver connection
+        driver.close()
+    if profiler:
+        profiler.write_report(args.query_report, args.query_report_csv)
+    if not written:
+        print("No labels found in the database.")
+        return
+    print("Data extraction completed.")
+
+
+# Run the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,648 @@
+"""
+This Python module is the shared schema extraction engine used by the Neo4j export scripts. Instead of running a count query, a property query and two relationship queries for every label (3-4 round trips and full label scans per label), it collects the whole schema in a constant number of bulk queries:
+- Labels: All unique labels from CALL db.labels().
+- Node Count: Count-store lookups for every label, read from the graph counts statistics or batched count(n) queries.
+- Properties: All property keys per label from CALL db.schema.nodeTypeProperties().
+- Relationships: One aggregated pass returning every distinct (source labels, relationship type, target labels) pattern with its relationship count, which is split into incoming and outgoing relationships for each label.
+
+The bulk results are collected in a deduplicated SchemaModel (see neo4j_schema_model.py) and turned into one record per label, with the same fields the per-label functions return:
+- label
+- count
+- properties
+- incoming_patterns / outgoing_patterns: The relationships as dicts with the relationship type, the connected labels and the relationship count
+- properties_exact: False when the property keys were discovered from a sample of the label's nodes
+- properties_sample_size: Number of nodes the property keys were discovered from
+- complete: False when a query for the label failed and the record is missing data
+
+Records do not hold formatted relationship strings, the outputs format the patterns with format_patterns when they write a record.
+
+For very large labels the property keys can be discovered from a sample instead of every node. The sampling configuration is a dict:
+- strategy: "exact" (every node), "first" (the first sample_size nodes), "random" (a random subset of about sample_size nodes) or "stratified" (equal slices of node ids spread evenly over the id range)
+- sample_size: Maximum number of nodes sampled per label
+- exact_threshold: Labels with at most this many nodes are always read exactly
+
+The "random" and "stratified" strategies do not scan the label: they look up candidate node ids (random ids, or contiguous id slices spread over the id range) with node-by-id seeks and keep the nodes that carry the label. The id range is taken from the count-store size of the whole graph, and enough candidates are drawn to expect sample_size hits, capped at MAX_SAMPLE_SEEKS seeks per label. So the work is bounded in time as well as heap, but a label holding a small share of the graph gets fewer than sample_size nodes, and nodes with ids above the node count (after many deletions) are never sampled.
+
+Labels that touch supernodes make the aggregated relationship pass expensive, because every relationship is expanded. The relationship discovery configuration is a dict:
+- strategy: "aggregated" (expand every relationship) or "by_type" (driven by relationship type, see below)
+- node_sample_size: Maximum number of nodes per label and relationship type whose relationships are expanded
+- max_degree: Maximum number of relationships expanded per node
+
+In "by_type" mode the count store is read for every (:Label)-[:TYPE]->() and ()-[:TYPE]->(:Label) pair, pairs with no relationships are skipped, and the connected labels of the remaining pairs are discovered by expanding at most max_degree relationships of at most node_sample_size nodes. Pattern counts are then estimated from the count-store count of the pair, split by the share of each connected label combination in the sample.
+
+A concurrent mode is also available, which runs the per-label property and relationship queries on a bounded pool of worker threads, each with its own session from the driver's connection pool. The labels are submitted and yielded in label order, so the output does not depend on which query finishes first; records that finish before an earlier label are held in a reorder buffer of at most REORDER_BUFFER records, and no new label is submitted while it is full.
+
+The per-label queries can be given a time budget, so one pathological label cannot block the whole run. The budget configuration is a dict:
+- timeout: Seconds each property or relationship query may take. The queries then run as managed read transactions with this transaction timeout. The bulk property and relationship queries get the same timeout, and when one of them runs out of time its part of the schema is read with the per-label queries instead.
+- fallback_node_limit: When a query times out, it is retried with a cheaper LIMIT-bounded scan of at most this many nodes of the label, expanding at most max_degree relationships per node.
+
+Records whose properties or relationships come from the fallback list them in their "degraded" field.
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import chain, islice
+
+from neo4j_query_profiler import profiled_label
+from neo4j_schema_model import SchemaModel
+
+logger = logging.getLogger(__name__)
+
+# Number of labels counted per query when the graph counts statistics are not available
+COUNT_BATCH_SIZE = 100
+# Default maximum number of labels extracted at the same time in concurrent mode
+MAX_IN_FLIGHT = 8
+# Maximum number of finished records held back in concurrent mode until the labels before them are extracted
+REORDER_BUFFER = 64
+# Default number of slices taken from a label by the stratified sampling strategy
+SAMPLE_STRATA = 10
+# Maximum number of node ids looked up per label by the random and stratified sampling strategies
+MAX_SAMPLE_SEEKS = 1000000
+
+# Sampling strategies for property-key discovery
+SAMPLING_STRATEGIES = ("exact", "first", "random", "stratified")
+# Strategies for relationship discovery
+DISCOVERY_STRATEGIES = ("aggregated", "by_type")
+# Default number of nodes read per query when the nodes of a label are streamed
+NODE_BATCH_SIZE = 10000
+# Default number of nodes read by the LIMIT-bounded fallback queries of a label that ran out of time
+FALLBACK_NODE_LIMIT = 10000
+# Default maximum number of relationships expanded per node by the by_type discovery and the relationship fallback
+MAX_DEGREE = 100
+# End of the sampling queries, returning the number of sampled nodes and their distinct property keys
+SAMPLED_KEYS_RETURN = """
+    WITH collect(keys(n)) AS keyLists
+    RETURN size(keyLists) AS sampled_nodes,
+           reduce(allKeys = [], keysList IN keyLists | allKeys + [key IN keysList WHERE NOT key IN allKeys]) AS keys
+    """
+
+
+# Function to format a relationship the same way the per-label queries do, e.g. "KNOWS (Person)"
+def format_relationship(relationship_name, connected_labels):
+    return f"{relationship_name} ({', '.join(connected_labels)})"
+
+
+# Function to add a relationship count to the pattern of a label, keyed by relationship type and connected labels
+# estimated marks counts that were not counted exactly, e.g. split from the count store or read from a bounded scan
+def add_pattern(patterns, relationship_name, connected_labels, count, estimated=False):
+    key = (relationship_name, tuple(connected_labels))
+    if key in patterns:
+        patterns[key]["count"] += count
+        patterns[key]["estimated"] = patterns[key]["estimated"] or estimated
+    else:
+        patterns[key] = {"type": relationship_name, "labels": list(connected_labels), "count": count, "estimated": estimated}
+
+
+# Function to format relationship patterns as strings, e.g. ["KNOWS (Person)", "WORKS_AT (Company)"]
+def format_patterns(patterns):
+    return [format_relationship(pattern["type"], pattern["labels"]) for pattern in patterns]
+
+
+# Function to describe the relationship count of a pattern, estimated counts are prefixed with "~", e.g. "~1234"
+def describe_count(pattern):
+    return f"~{pattern['count']}" if pattern.get("estimated") else pattern["count"]
+
+
+# Function to format the relationship counts of patterns, e.g. ["KNOWS (Person): ~1234"]
+def format_pattern_counts(patterns):
+    return [f"{format_relationship(pattern['type'], pattern['labels'])}: {describe_count(pattern)}" for pattern in patterns]
+
+
+# Function to iterate over the incoming and then the outgoing patterns of a record, without building a combined list
+def all_patterns(record):
+    return chain(record["incoming_patterns"], record["outgoing_patterns"])
+
+
+# Function to describe how the property keys of a record were discovered, e.g. "sampled (10000 of 400000000 nodes)"
+def describe_property_sampling(record):
+    if record.get("properties_exact", True):
+        return "exact"
+    return f"sampled ({record['properties_sample_size']} of {record['count']} nodes)"
+
+
+# Function to describe which parts of a record come from the cheaper fallback queries, e.g. "degraded (relationships)"
+def describe_degradation(record):
+    if not record.get("degraded"):
+        return ""
+    return f"degraded ({', '.join(record['degraded'])})"
+
+
+# Function to retrieve all labels in the database
+def get_all_labels(session):
+    result = session.run("CALL db.labels() YIELD label")
+    return [record["label"] for record in result]
+
+
+# Function to read the node count of every label from the count store in as few queries as possible
+def get_label_counts(session, labels):
+    counts = {label: 0 for label in labels}
+    try:
+        # A single call returns the count-store entry of every label
+        result = session.run("CALL db.stats.retrieve('GRAPH COUNTS') YIELD data RETURN data.nodes AS nodes")
+        for entry in result.single()["nodes"]:
+            if entry.get("label") in counts:
+                counts[entry["label"]] = entry["count"]
+        return counts
+    except Exception as e:
+        print(f"Graph counts statistics not available ({e}), falling back to batched count queries")
+
+    # Each UNION ALL branch uses a static label, so every count(n) is still served by the count store
+    for start in range(0, len(labels), COUNT_BATCH_SIZE):
+        batch = labels[start:start + COUNT_BATCH_SIZE]
+        query = "\nUNION ALL\n".join(
+            f"MATCH (n:`{label}`) RETURN $labels[{i}] AS label, count(n) AS count"
+            for i, label in enumerate(batch)
+        )
+        for record in session.run(query, labels=batch):
+            counts[record["label"]] = record["count"]
+    return counts
+
+
+# Function to collect the distinct property keys of every label in one schema procedure call
+def get_label_properties(session, labels):
+    properties = {label: {} for label in labels}
+    result = session.run("""
+    CALL db.schema.nodeTypeProperties() YIELD nodeLabels, propertyName
+    RETURN nodeLabels, propertyName
+    """)
+    for record in result:
+        if record["propertyName"] is None:
+            continue
+        for label in record["nodeLabels"]:
+            # A dict keeps the keys distinct while preserving the order they were found in
+            properties.setdefault(label, {})[record["propertyName"]] = None
+    return {label: list(keys) for label, keys in properties.items()}
+
+
+# Function to read every distinct (source labels, relationship type, target labels) pattern with its relationship count in one aggregated query
+# Each row is stored once by the schema model, outgoing for every label of the source node and incoming for every label of the target node
+def get_relationship_rows(session):
+    result = session.run("""
+    MATCH (a)-[r]->(b)
+    RETURN labels(a) AS source_labels, type(r) AS relationship_name, labels(b) AS target_labels, count(r) AS relationship_count
+    """)
+    return [(record["source_labels"], record["relationship_name"], record["target_labels"], record["relationship_count"]) for record in result]
+
+
+# Function to retrieve all relationship types in the database
+def get_all_relationship_types(session):
+    result = session.run("CALL db.relationshipTypes() YIELD relationshipType")
+    return [record["relationshipType"] for record in result]
+
+
+# Function to read the count-store relationship count of every (label, relationship type, direction) combination
+# Returns {label: {(relationship type, direction): count}} with only the combinations that have relationships,
+# so impossible label/type pairs can be skipped
+def get_relationship_type_counts(session, labels, relationship_types):
+    type_counts = {label: {} for label in labels}
+    try:
+        # A single call returns the count-store entries of every (:Label)-[:TYPE]->() and ()-[:TYPE]->(:Label) pair
+        result = session.run("CALL db.stats.retrieve('GRAPH COUNTS') YIELD data RETURN data.relationships AS relationships")
+        for entry in result.single()["relationships"]:
+            if not entry.get("count") or "relationshipType" not in entry:
+                continue
+            if "startLabel" in entry:
+                type_counts.setdefault(entry["startLabel"], {})[(entry["relationshipType"], "outgoing")] = entry["count"]
+            elif "endLabel" in entry:
+                type_counts.setdefault(entry["endLabel"], {})[(entry["relationshipType"], "incoming")] = entry["count"]
+        return type_counts
+    except Exception as e:
+        print(f"Graph counts statistics not available ({e}), falling back to count queries per label")
+
+    # Each UNION ALL branch binds one label and one type, so every count(r) is served by the count store
+    for label in labels:
+        query = "\nUNION ALL\n".join(
+            f"MATCH (:`{label}`)-[r:`{relationship_type}`]->() RETURN $types[{i}] AS relationship_type, 'outgoing' AS direction, count(r) AS count"
+            f"\nUNION ALL\n"
+            f"MATCH (:`{label}`)<-[r:`{relationship_type}`]-() RETURN $types[{i}] AS relationship_type, 'incoming' AS direction, count(r) AS count"
+            for i, relationship_type in enumerate(relationship_types)
+        )
+        if not query:
+            break
+        for record in session.run(query, types=relationship_types):
+            if record["count"]:
+                type_counts[label][(record["relationship_type"], record["direction"])] = record["count"]
+    return type_counts
+
+
+# Function to discover the relationships of a label one relationship type at a time, without expanding supernodes
+def get_relationships_by_type(session, label_name, type_counts, discovery):
+    node_sample_size = discovery.get("node_sample_size", 1000)
+    max_degree = discovery.get("max_degree", MAX_DEGREE)
+    patterns = {"incoming": {}, "outgoing": {}}
+    for (relationship_type, direction), type_count in type_counts.get(label_name, {}).items():
+        arrow = f"-[:`{relationship_type}`]->" if direction == "outgoing" else f"<-[:`{relationship_type}`]-"
+        # At most max_degree relationships are expanded for each of at most node_sample_size nodes
+        query = f"""
+        MATCH (a:`{label_name}`)
+        WHERE EXISTS {{ MATCH (a){arrow}() }}
+        WITH a LIMIT $node_sample_size
+        CALL {{
+            WITH a
+            MATCH (a){arrow}(b)
+            RETURN b LIMIT $max_degree
+        }}
+        RETURN labels(b) AS connected_labels, count(*) AS sampled_count
+        """
+        result = list(session.run(query, node_sample_size=node_sample_size, max_degree=max_degree))
+        sampled_total = sum(record["sampled_count"] for record in result)
+        for record in result:
+            # The count store only knows the label/type pair, so split its count by the share in the sample
+            estimated_count = round(type_count * record["sampled_count"] / sampled_total)
+            add_pattern(patterns[direction], relationship_type, record["connected_labels"], estimated_count, estimated=True)
+    return list(patterns["incoming"].values()), list(patterns["outgoing"].values())
+
+
+# Function to add the properties of the given labels to a schema model with one query per label
+def add_properties_per_label(session, model, labels, counts, sampling=None, budget=None):
+    for label in labels:
+        try:
+            with profiled_label(label):
+                properties, sample_size, fallback = get_properties_within_budget(session, label, counts.get(label, 0), sampling, budget)
+            model.set_properties(label, properties, sample_size)
+            if fallback:
+                model.mark_degraded(label, "properties")
+        except Exception as e:
+            print(f"Error retrieving properties for {label}: {e}")
+            model.mark_failed(label)
+
+
+# Function to add the relationships of the given labels to a schema model with queries per label
+def add_relationships_per_label(session, model, labels, discovery=None, type_counts=None, budget=None):
+    for label in labels:
+        try:
+            with profiled_label(label):
+                incoming, outgoing, fallback = get_relationships_within_budget(session, label, discovery, type_counts, budget)
+            model.add_label_patterns(label, "incoming", incoming)
+            model.add_label_patterns(label, "outgoing", outgoing)
+            if fallback:
+                model.mark_degraded(label, "relationships")
+        except Exception as e:
+            print(f"Error retrieving relationships for {label}: {e}")
+            model.mark_failed(label)
+
+
+# Function to extract labels, node counts, properties and relationships for the whole database into a schema model
+# When a bulk query fails or runs out of the budget's time, its part of the schema is read with the per-label queries instead
+def build_schema_model(driver, sampling=None, discovery=None, budget=None):
+    model = SchemaModel()
+    with driver.session() as session:
+        labels = get_all_labels(session)
+        print(f"Labels found: {len(labels)}")
+        counts = get_label_counts(session, labels)
+        for label in labels:
+            model.add_label(label, counts.get(label, 0))
+        print("Node counts retrieved")
+        if is_sampling_enabled(sampling):
+            # The schema procedure reads every node, so sampled discovery has to run per label
+            add_properties_per_label(session, model, labels, counts, sampling, budget)
+        else:
+            try:
+                for label, properties in run_within_budget(session, budget, get_label_properties, labels).items():
+                    if label in model.label_ids:
+                        model.set_properties(label, properties)
+            except Exception as e:
+                if budget and is_timeout(e):
+                    print("Schema procedure ran out of time, falling back to property queries per label")
+                else:
+                    print(f"Schema procedure not available ({e}), falling back to property queries per label")
+                add_properties_per_label(session, model, labels, counts, sampling, budget)
+        print("Properties retrieved")
+        if is_discovery_by_type(discovery):
+            type_counts = get_relationship_type_counts(session, labels, get_all_relationship_types(session))
+            add_relationships_per_label(session, model, labels, discovery, type_counts, budget)
+        else:
+            try:
+                rows = run_within_budget(session, budget, get_relationship_rows)
+            except Exception as e:
+                if budget and is_timeout(e):
+                    print("Aggregated relationship query ran out of time, falling back to relationship queries per label")
+                else:
+                    print(f"Aggregated relationship query failed ({e}), falling back to relationship queries per label")
+                add_relationships_per_label(session, model, labels, discovery, None, budget)
+            else:
+                for row in rows:
+                    model.add_relationships(*row)
+        print("Relationships retrieved")
+    return model
+
+
+# Function to extract the schema with bulk queries, yielding the record of every label as it is created from the model
+# Errors that leave no schema at all, e.g. an unreachable database, are raised instead of returning no records
+def iter_schema(driver, sampling=None, discovery=None, budget=None):
+    print("Extracting schema with bulk queries...")
+    try:
+        model = build_schema_model(driver, sampling, discovery, budget)
+    except Exception as e:
+        print(f"Error extracting schema: {e}")
+        raise
+    yield from model.iter_records()
+
+
+# Function to extract labels, node counts, properties and relationships for the whole database
+def extract_schema(driver, sampling=None, discovery=None, budget=None):
+    return list(iter_schema(driver, sampling, discovery, budget))
+
+
+# Function to get distinct properties for a single label
+def get_distinct_properties(session, label_name):
+    query = f"""
+    MATCH (n:`{label_name}`)
+    WITH collect(DISTINCT keys(n)) AS allKeys
+    UNWIND allKeys AS keysList
+    UNWIND keysList AS key
+    RETURN DISTINCT key
+    """
+    result = session.run(query)
+    return [record["key"] for record in result]
+
+
+# Function to check whether a sampling configuration samples any labels at all
+def is_sampling_enabled(sampling):
+    return bool(sampling) and sampling.get("strategy", "exact") != "exact"
+
+
+# Function to check whether a relationship discovery configuration is driven by relationship type
+def is_discovery_by_type(discovery):
+    return bool(discovery) and discovery.get("strategy", "aggregated") == "by_type"
+
+
+# Function to build the query that returns the nodes sampled from a label for the given strategy
+# id_range is the count-store size of the whole graph, the random and stratified strategies draw node ids below it
+def build_sample_query(label_name, count, strategy, sample_size, id_range=None):
+    if strategy == "first":
+        return f"""
+        MATCH (n:`{label_name}`)
+        WITH n LIMIT {sample_size}
+        """
+    # Enough candidate ids to expect sample_size nodes of the label, each one is a node-by-id seek instead of a label scan
+    id_range = max(id_range or count, 1)
+    candidates = max(min(-(-sample_size * id_range // max(count, 1)), MAX_SAMPLE_SEEKS), 1)
+    if strategy == "random":
+        return f"""
+        UNWIND range(1, {candidates}) AS draw
+        WITH toInteger(rand() * {id_range}) AS node_id
+        MATCH (n) WHERE id(n) = node_id AND n:`{label_name}`
+        WITH DISTINCT n LIMIT {sample_size}
+        """
+    if strategy == "stratified":
+        # Contiguous id slices at offsets spread evenly over the id range
+        strata = min(SAMPLE_STRATA, candidates)
+        slice_size = candidates // strata
+        return f"""
+        UNWIND range(0, {strata - 1}) AS stratum
+        UNWIND range(stratum * {id_range // strata}, stratum * {id_range // strata} + {slice_size - 1}) AS node_id
+        MATCH (n) WHERE id(n) = node_id AND n:`{label_name}`
+        WITH n
+        """
+    raise ValueError(f"Unknown property sampling strategy: {strategy}")
+
+
+# Function to get the property keys of a label from a sample of its nodes
+# Returns the properties and the number of sampled nodes, or None as the sample size when every node was read
+def get_sampled_properties(session, label_name, count, sampling):
+    strategy = sampling.get("strategy", "exact")
+    sample_size = sampling.get("sample_size", 10000)
+    exact_threshold = sampling.get("exact_threshold", 0)
+    # Small labels are cheap to read exactly, and a sample as big as the label is exact anyway
+    if strategy == "exact" or count <= max(sample_size, exact_threshold):
+        return get_distinct_properties(session, label_name), None
+
+    id_range = None
+    if strategy in ("random", "stratified"):
+        # Served by the count store
+        id_range = session.run("MATCH (n) RETURN count(n) AS count").single()["count"]
+    # Only the sampled nodes are collected, so the server heap is bounded by sample_size
+    record = session.run(build_sample_query(label_name, count, strategy, sample_size, id_range) + SAMPLED_KEYS_RETURN).single()
+    return list(record["keys"]), record["sampled_nodes"]
+
+
+# Function to get the property keys of at most node_limit nodes of a label with a LIMIT-bounded scan
+# Returns the properties and the number of scanned nodes
+def get_bounded_properties(session, label_name, node_limit=FALLBACK_NODE_LIMIT):
+    record = session.run(build_sample_query(label_name, node_limit, "first", node_limit) + SAMPLED_KEYS_RETURN).single()
+    return list(record["keys"]), record["sampled_nodes"]
+
+
+# Function to group the records of a streamed result into lists of at most batch_size records
+def iter_batches(records, batch_size=NODE_BATCH_SIZE):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Function to read the nodes of a label batch by batch from one streamed query, at most limit nodes when a limit is given
+# The label is scanned once, the driver pulls the records from the server fetch_size at a time while the batches are consumed,
+# so the session should be opened with fetch_size=batch_size
+def iter_node_batches(session, label_name, batch_size=NODE_BATCH_SIZE, limit=None):
+    result = session.run(f"""
+    MATCH (n:`{label_name}`)
+    RETURN elementId(n) AS id, properties(n) AS properties
+    {"LIMIT $limit" if limit else ""}
+    """, limit=limit)
+    yield from iter_batches(result, batch_size)
+
+
+# Function to get the incoming and outgoing relationship patterns with connected node labels for a single label
+def get_all_relationships(session, label_name):
+    incoming_query = f"""
+    MATCH (a:`{label_name}`)<-[r]-(b)
+    RETURN type(r) AS relationship_name, labels(b) AS connected_labels, count(r) AS relationship_count
+    """
+    outgoing_query = f"""
+    MATCH (a:`{label_name}`)-[r]->(b)
+    RETURN type(r) AS relationship_name, labels(b) AS connected_labels, count(r) AS relationship_count
+    """
+    incoming_patterns = {}
+    outgoing_patterns = {}
+    for record in session.run(incoming_query):
+        add_pattern(incoming_patterns, record["relationship_name"], record["connected_labels"], record["relationship_count"])
+    for record in session.run(outgoing_query):
+        add_pattern(outgoing_patterns, record["relationship_name"], record["connected_labels"], record["relationship_count"])
+    return list(incoming_patterns.values()), list(outgoing_patterns.values())
+
+
+# Function to get the incoming and outgoing relationship patterns of a label from at most node_limit of its nodes
+# At most max_degree relationships are expanded per node, so one supernode cannot stall the fallback
+# The counts only cover the expanded relationships, so they are a lower bound
+def get_bounded_relationships(session, label_name, node_limit=FALLBACK_NODE_LIMIT, max_degree=MAX_DEGREE):
+    patterns = {"incoming": {}, "outgoing": {}}
+    for direction, arrow in (("incoming", "<-[r]-"), ("outgoing", "-[r]->")):
+        query = f"""
+        MATCH (a:`{label_name}`)
+        WITH a LIMIT $node_limit
+        CALL {{
+            WITH a
+            MATCH (a){arrow}(b)
+            RETURN r, b LIMIT $max_degree
+        }}
+        RETURN type(r) AS relationship_name, labels(b) AS connected_labels, count(r) AS relationship_count
+        """
+        for record in session.run(query, node_limit=node_limit, max_degree=max_degree):
+            add_pattern(patterns[direction], record["relationship_name"], record["connected_labels"], record["relationship_count"], estimated=True)
+    return list(patterns["incoming"].values()), list(patterns["outgoing"].values())
+
+
+# Function to check whether a query failed because it ran out of its transaction timeout
+def is_timeout(error):
+    return "TransactionTimedOut" in (getattr(error, "code", None) or "")
+
+
+# Function to run a query function on a session, as a managed read transaction with the budget's timeout when one is set
+def run_within_budget(session, budget, function, *args):
+    timeout = (budget or {}).get("timeout")
+    if not timeout:
+        return function(session, *args)
+    from neo4j import unit_of_work
+
+    return session.execute_read(unit_of_work(timeout=timeout)(lambda tx: function(tx, *args)))
+
+
+# Function to get the properties of a label within the budget, retrying with a LIMIT-bounded scan when the query times out
+# Returns the properties, the sample size (None when every node was read) and whether the fallback was used
+def get_properties_within_budget(session, label_name, count, sampling, budget=None):
+    try:
+        if is_sampling_enabled(sampling):
+            properties, sample_size = run_within_budget(session, budget, get_sampled_properties, label_name, count, sampling)
+        else:
+            properties, sample_size = run_within_budget(session, budget, get_distinct_properties, label_name), None
+        return properties, sample_size, False
+    except Exception as e:
+        if not budget or not is_timeout(e):
+            raise
+    node_limit = budget.get("fallback_node_limit", FALLBACK_NODE_LIMIT)
+    print(f"Properties of {label_name} ran out of time, retrying with the first {node_limit} nodes")
+    properties, sample_size = run_within_budget(session, budget, get_bounded_properties, label_name, node_limit)
+    return properties, sample_size, True
+
+
+# Function to get the relationships of a label within the budget, retrying with a LIMIT-bounded scan when the query times out
+# Returns the incoming and outgoing patterns and whether the fallback was used
+def get_relationships_within_budget(session, label_name, discovery, type_counts=None, budget=None):
+    try:
+        if is_discovery_by_type(discovery):
+            incoming, outgoing = run_within_budget(session, budget, get_relationships_by_type, label_name, type_counts, discovery)
+        else:
+            incoming, outgoing = run_within_budget(session, budget, get_all_relationships, label_name)
+        return incoming, outgoing, False
+    except Exception as e:
+        if not budget or not is_timeout(e):
+            raise
+    node_limit = budget.get("fallback_node_limit", FALLBACK_NODE_LIMIT)
+    max_degree = (discovery or {}).get("max_degree", MAX_DEGREE)
+    print(f"Relationships of {label_name} ran out of time, retrying with the first {node_limit} nodes")
+    incoming, outgoing = run_within_budget(session, budget, get_bounded_relationships, label_name, node_limit, max_degree)
+    return incoming, outgoing, True
+
+
+# Function to extract the properties and relationships of one label in its own session
+def extract_label(driver, label, count, sampling=None, discovery=None, type_counts=None, budget=None):
+    record = {
+        "label": label,
+        "count": count,
+        "properties": [],
+        "incoming_patterns": [],
+        "outgoing_patterns": [],
+        "properties_exact": True,
+        "properties_sample_size": count,
+        "complete": True,
+        "degraded": [],
+    }
+    # Errors stay per label, so one failing label does not affect the others
+    with profiled_label(label):
+        try:
+            with driver.session() as session:
+                properties, sample_size, fallback = get_properties_within_budget(session, label, count, sampling, budget)
+                if sample_size is not None:
+                    record["properties_exact"] = False
+                    record["properties_sample_size"] = sample_size
+                record["properties"] = properties
+                if fallback:
+                    record["degraded"].append("properties")
+        except Exception as e:
+            print(f"Error retrieving properties for {label}: {e}")
+            record["complete"] = False
+        try:
+            with driver.session() as session:
+                incoming, outgoing, fallback = get_relationships_within_budget(session, label, discovery, type_counts, budget)
+                record["incoming_patterns"] = incoming
+                record["outgoing_patterns"] = outgoing
+                if fallback:
+                    record["degraded"].append("relationships")
+        except Exception as e:
+            print(f"Error retrieving relationships for {label}: {e}")
+            record["complete"] = False
+    return record
+
+
+# Function to extract all labels concurrently with at most max_in_flight labels being queried at once
+def extract_schema_concurrently(driver, max_in_flight=MAX_IN_FLIGHT, sampling=None, discovery=None, budget=None):
+    return list(iter_schema_concurrently(driver, max_in_flight, sampling, discovery, budget))
+
+
+# Function to extract all labels concurrently, yielding the records in label order as soon as the labels before them are extracted
+def iter_schema_concurrently(driver, max_in_flight=MAX_IN_FLIGHT, sampling=None, discovery=None, budget=None):
+    print(f"Extracting schema concurrently with up to {max_in_flight} labels in flight...")
+    try:
+        with driver.session() as session:
+            labels = get_all_labels(session)
+            print(f"Labels found: {len(labels)}")
+            counts = get_label_counts(session, labels)
+            type_counts = None
+            if is_discovery_by_type(discovery):
+                # Read once and shared by all workers
+                type_counts = get_relationship_type_counts(session, labels, get_all_relationship_types(session))
+    except Exception as e:
+        # Without the labels nothing can be extracted, so the caller has to know the run failed
+        print(f"Error retrieving labels: {e}")
+        raise
+
+    yield from iter_labels_concurrently(driver, labels, counts, max_in_flight, sampling, discovery, type_counts, budget)
+
+
+# Function to extract the given labels on a bounded worker pool, returning the records sorted by label
+def extract_labels_concurrently(driver, labels, counts, max_in_flight=MAX_IN_FLIGHT, sampling=None, discovery=None, type_counts=None, budget=None):
+    return list(iter_labels_concurrently(driver, labels, counts, max_in_flight, sampling, discovery, type_counts, budget))
+
+
+# Function to extract the given labels on a bounded worker pool, yielding the records in label order
+# At most max_in_flight labels run at a time and at most reorder_buffer finished records wait for an earlier label,
+# every future is dropped once its record is yielded, so the memory held by the pool does not grow with the number of labels
+def iter_labels_concurrently(driver, labels, counts, max_in_flight=MAX_IN_FLIGHT, sampling=None, discovery=None, type_counts=None, budget=None,
+                             reorder_buffer=REORDER_BUFFER):
+    extracted = 0
+    scheduled = iter(sorted(labels))
+    # Submitted labels in label order, the first one is the next to be yielded
+    pending = deque()
+    # Each worker takes its own session from the driver's connection pool, so the pool
+    # size (max_connection_pool_size) should be at least max_in_flight
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while True:
+            # Keep max_in_flight labels running as long as the reorder buffer has room, the next labels are submitted
+            # before a record is handed on, so the workers stay busy while it is written
+            running = sum(not future.done() for _, future in pending)
+            free = min(max_in_flight - running, max_in_flight + reorder_buffer - len(pending))
+            for label in islice(scheduled, max(free, 0)):
+                pending.append((label, executor.submit(extract_label, driver, label, counts.get(label, 0), sampling, discovery, type_counts, budget)))
+            if not pending:
+                break
+            label, future = pending[0]
+            if not future.done():
+                wait([future for _, future in pending if not future.done()], return_when=FIRST_COMPLETED)
+                continue
+            pending.popleft()
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"Error extracting label {label}: {e}")
+                continue
+            extracted += 1
+            # The scripts show a throttled progress line instead of one line per label
+            logger.debug("Extracted %s (%d/%d)", label, extracted, len(labels))
+            yield record
@@ -0,0 +1,243 @@
+"""
+This Python script exports the schema of many databases in one run, spread over any number of Neo4j clusters. The targets are listed in a JSON config file:
+
+    {
+        "targets": [
+            {"uri": "neo4j://cluster-a:7687", "database": "sales"},
+            {"uri": "neo4j://cluster-a:7687", "database": "billing"},
+            {"uri": "neo4j://cluster-b:7687", "database": "crm", "username": "reader", "password_env": "CLUSTER_B_PASSWORD", "name": "crm-eu"}
+        ]
+    }
+
+- Connection Pooling: One driver is created per cluster (URI and username) and shared by all databases on that cluster, so every database reuses the same connection pool.
+- Read Routing: Every session is opened in read access mode for its target database, so with neo4j:// URIs the queries are routed to followers and read replicas instead of the leader.
+- Fan-Out: Up to --max-databases databases are extracted at the same time.
+- Outputs: Every database gets its own directory (named after the target name, or host and database) with the selected outputs. A combined summary is written next to them: summary.csv with one row per database and label, and summary.json with the totals and the status of every database.
+
+Example:
+    python neo4j_schema_fanout.py --config targets.json --output-dir exports --csv --xlsx --max-databases 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from neo4j_schema_export import create_driver, extract_records, write_records
+from neo4j_schema_extractor import FALLBACK_NODE_LIMIT, MAX_IN_FLIGHT
+from neo4j_schema_graph import SchemaGraphSink
+from neo4j_schema_sinks import SINKS, GraphImageSink
+
+# Default number of databases extracted at the same time
+MAX_DATABASES = 4
+# File names of the outputs written to the directory of every database
+OUTPUT_FILES = {"csv": "schema.csv", "xlsx": "schema.xlsx", "png": "graphs", "schema_graph": "schema_graph"}
+# Header of the combined summary CSV
+SUMMARY_HEADER = ["Target", "URI", "Database", "Label", "Node Count", "Properties", "Incoming Relationships", "Outgoing Relationships"]
+
+
+# Driver wrapper opening every session in read access mode on one database, everything else is passed to the real driver
+class DatabaseDriver:
+    def __init__(self, driver, database):
+        self.driver = driver
+        self.database = database
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def session(self, **kwargs):
+        from neo4j import READ_ACCESS
+
+        kwargs.setdefault("database", self.database)
+        # Read sessions are routed to followers and read replicas
+        kwargs.setdefault("default_access_mode", READ_ACCESS)
+        return self.driver.session(**kwargs)
+
+
+# Function to load the targets from the config file, filling in the connection defaults
+def load_targets(filename, username=None, password=None):
+    with open(filename, encoding="utf-8") as file:
+        config = json.load(file)
+    targets = []
+    for target in config.get("targets", []):
+        target = dict(target)
+        target.setdefault("database", None)
+        target.setdefault("username", username)
+        if "password_env" in target:
+            target["password"] = os.environ.get(target.pop("password_env"))
+        target.setdefault("password", password)
+        if not target.get("name"):
+            target["name"] = f"{urlparse(target['uri']).hostname}_{target['database'] or 'default'}"
+        targets.append(target)
+    return targets
+
+
+# Function to create one driver per cluster, keyed by URI and username
+def create_drivers(targets, max_connection_pool_size=None):
+    drivers = {}
+    for target in targets:
+        key = (target["uri"], target["username"])
+        if key not in drivers:
+            options = {"max_connection_pool_size": max_connection_pool_size} if max_connection_pool_size else {}
+            drivers[key] = create_driver(target["uri"], target["username"], target["password"], **options)
+    return drivers
+
+
+# Function to create the sinks writing the selected outputs to the directory of one database
+def create_target_sinks(directory, outputs, render_workers=None):
+    sinks = []
+    for output in outputs:
+        target = os.path.join(directory, OUTPUT_FILES[output])
+        if output == "png":
+            sinks.append(GraphImageSink(target, workers=render_workers))
+        elif output == "schema_graph":
+            sinks.append(SchemaGraphSink(target))
+        else:
+            sinks.append(SINKS[output](target))
+    return sinks
+
+
+# Function to extract the schema of one target database and write its outputs
+# A database that cannot be extracted raises, so no outputs are written for it and its summary records the error
+def extract_target(driver, target, output_dir, outputs, extraction_options, render_workers=None):
+    start = time.perf_counter()
+    directory = os.path.join(output_dir, re.sub(r"[^\w.-]", "_", target["name"]))
+    print(f"Extracting {target['name']} ({target['uri']}, database {target['database'] or 'default'})...")
+    records = extract_records(DatabaseDriver(driver, target["database"]), **extraction_options)
+    os.makedirs(directory, exist_ok=True)
+    write_records(records, create_target_sinks(directory, outputs, render_workers))
+    return {
+        "target": target["name"],
+        "uri": target["uri"],
+        "database": target["database"],
+        "directory": directory,
+        "labels": len(records),
+        "nodes": sum(record["count"] for record in records),
+        "incomplete_labels": sum(1 for record in records if not record.get("complete", True)),
+        "degraded_labels": sum(1 for record in records if record.get("degraded")),
+        "wall_time": time.perf_counter() - start,
+        "error": None,
+    }, records
+
+
+# Function to write the combined cross-database summary as CSV (one row per database and label) and JSON (one entry per database)
+def write_summary(output_dir, summaries, records_by_target):
+    csv_file = os.path.join(output_dir, "summary.csv")
+    json_file = os.path.join(output_dir, "summary.json")
+    try:
+        with open(csv_file, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(SUMMARY_HEADER)
+            for summary in summaries:
+                for record in records_by_target.get(summary["target"], []):
+                    writer.writerow([
+                        summary["target"],
+                        summary["uri"],
+                        summary["database"],
+                        record["label"],
+                        record["count"],
+                        len(record["properties"]),
+                        len(record["incoming_patterns"]),
+                        len(record["outgoing_patterns"]),
+                    ])
+        with open(json_file, mode="w", encoding="utf-8") as file:
+            json.dump({
+                "databases": len(summaries),
+                "failed_databases": sum(1 for summary in summaries if summary["error"]),
+                "labels": sum(summary["labels"] for summary in summaries),
+                "nodes": sum(summary["nodes"] for summary in summaries),
+                "targets": summaries,
+            }, file, indent=2)
+        print(f"Combined summary written to {csv_file} and {json_file}")
+    except Exception as e:
+        print(f"Error writing combined summary: {e}")
+
+
+# Function to extract every target database, at most max_databases at the same time
+def extract_targets(targets, output_dir, outputs, max_databases=MAX_DATABASES, extraction_options=None, render_workers=None):
+    extraction_options = extraction_options or {}
+    os.makedirs(output_dir, exist_ok=True)
+    # Every worker may hold max_in_flight sessions, so the pool of each cluster is sized for all of them
+    pool_size = max_databases * extraction_options.get("max_in_flight", MAX_IN_FLIGHT) if extraction_options.get("concurrent_extraction") else None
+    drivers = create_drivers(targets, pool_size)
+    summaries = []
+    records_by_target = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_databases) as executor:
+            futures = {
+                executor.submit(extract_target, drivers[(target["uri"], target["username"])], target, output_dir, outputs, extraction_options, render_workers): target
+                for target in targets
+            }
+            for future in as_completed(futures):
+                target = futures[future]
+                try:
+                    summary, records = future.result()
+                    records_by_target[target["name"]] = records
+                except Exception as e:
+                    print(f"Error extracting {target['name']}: {e}")
+                    summary = {"target": target["name"], "uri": target["uri"], "database": target["database"], "directory": None,
+                               "labels": 0, "nodes": 0, "incomplete_labels": 0, "degraded_labels": 0, "wall_time": None, "error": str(e)}
+                summaries.append(summary)
+                print(f"Finished {target['name']} ({len(summaries)}/{len(targets)})")
+    finally:
+        # Close the Neo4j driver of every cluster
+        for driver in drivers.values():
+            driver.close()
+    summaries.sort(key=lambda summary: summary["target"])
+    write_summary(output_dir, summaries, records_by_target)
+    return summaries
+
+
+# Function to parse the command line arguments
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the schema of many Neo4j databases across clusters in one run.")
+    parser.add_argument("--config", required=True, help="JSON file listing the target databases")
+    parser.add_argument("--output-dir", required=True, help="Directory the per-database outputs and the combined summary are written to")
+    parser.add_argument("--username", default=os.environ.get("NEO4J_USERNAME", "neo4j"), help="Default Neo4j username")
+    parser.add_argument("--password", default=os.environ.get("NEO4J_PASSWORD"), help="Default Neo4j password (defaults to $NEO4J_PASSWORD)")
+    parser.add_argument("--csv", action="store_true", help="Write the CSV export of every database")
+    parser.add_argument("--xlsx", action="store_true", help="Write the Excel export of every database")
+    parser.add_argument("--png", action="store_true", help="Write the network graph images of every database")
+    parser.add_argument("--schema-graph", action="store_true", help="Write the whole-schema graph of every database")
+    parser.add_argument("--render-workers", type=int, help="Number of processes rendering graph images per database")
+    parser.add_argument("--max-databases", type=int, default=MAX_DATABASES, help="Maximum number of databases extracted at the same time")
+    parser.add_argument("--concurrent", action="store_true", help="Extract the labels of every database concurrently instead of with bulk queries")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="Maximum number of labels queried at the same time per database")
+    parser.add_argument("--sampling", default="exact", choices=["exact", "first", "random", "stratified"], help="Property sampling strategy")
+    parser.add_argument("--sample-size", type=int, default=10000, help="Nodes sampled per label for property discovery")
+    parser.add_argument("--exact-threshold", type=int, default=1000000, help="Labels with at most this many nodes are read exactly")
+    parser.add_argument("--timeout", type=float, help="Seconds each query may take: a bulk query falls back to per-label queries, a per-label query to a LIMIT-bounded scan")
+    parser.add_argument("--fallback-node-limit", type=int, default=FALLBACK_NODE_LIMIT, help="Nodes read by the fallback scan of a label that ran out of time")
+    parser.add_argument("--discovery", default="aggregated", choices=["aggregated", "by_type"], help="Relationship discovery strategy")
+    return parser.parse_args()
+
+
+# Main function to extract every database listed in the config file
+def main():
+    args = parse_args()
+    outputs = [output for output in OUTPUT_FILES if getattr(args, output)]
+    targets = load_targets(args.config, args.username, args.password)
+    if not targets:
+        print(f"No targets found in {args.config}.")
+        return
+    extraction_options = {
+        "concurrent_extraction": args.concurrent,
+        "max_in_flight": args.max_in_flight,
+        "sampling": {"strategy": args.sampling, "sample_size": args.sample_size, "exact_threshold": args.exact_threshold},
+        "discovery": {"strategy": args.discovery, "node_sample_size": 1000, "max_degree": 100},
+        "budget": {"timeout": args.timeout, "fallback_node_limit": args.fallback_node_limit} if args.timeout else None,
+    }
+    summaries = extract_targets(targets, args.output_dir, outputs, args.max_databases, extraction_options, args.render_workers)
+    failed = [summary["target"] for summary in summaries if summary["error"]]
+    if failed:
+        print(f"Extraction failed for {len(failed)} databases: {', '.join(failed)}")
+    print("Data extraction completed.")
+
+
+# Run the main function
+if __name__ == "__main__":
+    main()
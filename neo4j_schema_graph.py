@@ -0,0 +1,294 @@
+"""
+This Python module builds one label-level graph of the whole database schema, as an overview next to the per-label network graph images:
+- Nodes: One node per label, with its node count and number of properties.
+- Edges: One edge per (source label, target label) pair, with the count of every relationship type between them and the total relationship count.
+
+The graph is exported to an output directory as:
+- schema_graph.graphml: For Gephi, yEd, Cytoscape or NetworkX.
+- schema_graph.json: Nodes and edges with their attributes and layout coordinates.
+- schema_graph.html: A single self-contained viewer that draws the graph on a canvas with pan, zoom, search and a details panel. The layout coordinates are computed in Python beforehand, so the browser only draws and stays responsive for schemas with thousands of labels.
+"""
+
+import json
+import os
+
+from neo4j_schema_sinks import LAYOUT_CACHE_DIR, graph_node_name, layout_graph
+
+# Base name of the exported schema graph files
+SCHEMA_GRAPH_NAME = "schema_graph"
+
+# Template of the HTML viewer, the graph data replaces __SCHEMA_DATA__
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Neo4j Schema Graph</title>
+<style>
+html, body { margin: 0; height: 100%; overflow: hidden; font-family: sans-serif; }
+canvas { display: block; cursor: grab; }
+.panel { position: absolute; background: #fff; border: 1px solid #ccc; border-radius: 4px; padding: 6px 8px; font-size: 13px; }
+#bar { top: 8px; left: 8px; }
+#info { bottom: 8px; left: 8px; max-width: 40%; max-height: 45%; overflow: auto; display: none; }
+#info table { border-collapse: collapse; }
+#info td { padding: 1px 6px 1px 0; vertical-align: top; }
+</style>
+</head>
+<body>
+<canvas id="canvas"></canvas>
+<div id="bar" class="panel"><input id="search" placeholder="Find label" list="labels"> <span id="stats"></span><datalist id="labels"></datalist></div>
+<div id="info" class="panel"></div>
+<script>
+const schema = __SCHEMA_DATA__;
+const canvas = document.getElementById("canvas");
+const context = canvas.getContext("2d");
+const nodes = schema.nodes;
+const edges = schema.edges;
+const indexById = new Map(nodes.map((node, i) => [node.id, i]));
+const neighbours = nodes.map(() => []);
+edges.forEach((edge, i) => { neighbours[edge[0]].push(i); neighbours[edge[1]].push(i); });
+const radius = nodes.map(node => 3 + Math.log10(1 + node.count));
+let scale = 1, offsetX = 0, offsetY = 0, selected = -1, hovered = -1, pending = false;
+
+document.getElementById("stats").textContent = nodes.length + " labels, " + edges.length + " label pairs";
+document.getElementById("labels").innerHTML = nodes.map(node => "<option value=\\"" + escapeHtml(node.id) + "\\">").join("");
+
+function escapeHtml(text) {
+  return String(text).replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\\"": "&quot;"}[c]));
+}
+function screenX(i) { return nodes[i].x * scale + offsetX; }
+function screenY(i) { return nodes[i].y * scale + offsetY; }
+function fit() {
+  canvas.width = window.innerWidth;
+  canvas.height = window.innerHeight;
+  const size = Math.min(canvas.width, canvas.height) / 2 * 0.9;
+  scale = size;
+  offsetX = canvas.width / 2;
+  offsetY = canvas.height / 2;
+  redraw();
+}
+function redraw() {
+  if (!pending) { pending = true; requestAnimationFrame(draw); }
+}
+function draw() {
+  pending = false;
+  context.clearRect(0, 0, canvas.width, canvas.height);
+  // All edges are drawn as a single path, the edges of the selected label are highlighted on top
+  context.strokeStyle = selected < 0 ? "rgba(120, 120, 120, 0.35)" : "rgba(120, 120, 120, 0.12)";
+  context.lineWidth = 1;
+  context.beginPath();
+  for (const edge of edges) {
+    context.moveTo(screenX(edge[0]), screenY(edge[0]));
+    context.lineTo(screenX(edge[1]), screenY(edge[1]));
+  }
+  context.stroke();
+  const showArrows = scale > 2000 || edges.length < 2000;
+  if (selected >= 0) {
+    context.strokeStyle = "rgba(200, 40, 40, 0.8)";
+    context.lineWidth = 1.5;
+    for (const i of neighbours[selected]) drawEdge(edges[i], true);
+  } else if (showArrows) {
+    context.strokeStyle = "rgba(120, 120, 120, 0.5)";
+    for (const edge of edges) drawEdge(edge, true);
+  }
+  const showLabels = nodes.length < 200 || scale > 3000;
+  context.font = "11px sans-serif";
+  for (let i = 0; i < nodes.length; i++) {
+    const x = screenX(i), y = screenY(i);
+    if (x < -20 || y < -20 || x > canvas.width + 20 || y > canvas.height + 20) continue;
+    context.fillStyle = i === selected ? "#c82828" : (i === hovered ? "#f08080" : "lightcoral");
+    context.beginPath();
+    context.arc(x, y, radius[i], 0, 2 * Math.PI);
+    context.fill();
+    if (showLabels || i === selected || i === hovered) {
+      context.fillStyle = "#222";
+      context.fillText(nodes[i].id, x + radius[i] + 2, y + 4);
+    }
+  }
+  if (selected >= 0) {
+    context.fillStyle = "#222";
+    for (const i of neighbours[selected]) {
+      const other = edges[i][0] === selected ? edges[i][1] : edges[i][0];
+      context.fillText(nodes[other].id, screenX(other) + radius[other] + 2, screenY(other) + 4);
+    }
+  }
+}
+function drawEdge(edge, arrow) {
+  const x1 = screenX(edge[0]), y1 = screenY(edge[0]), x2 = screenX(edge[1]), y2 = screenY(edge[1]);
+  context.beginPath();
+  context.moveTo(x1, y1);
+  context.lineTo(x2, y2);
+  if (arrow && (x1 !== x2 || y1 !== y2)) {
+    const angle = Math.atan2(y2 - y1, x2 - x1);
+    const tipX = x2 - Math.cos(angle) * radius[edge[1]], tipY = y2 - Math.sin(angle) * radius[edge[1]];
+    context.moveTo(tipX, tipY);
+    context.lineTo(tipX - 7 * Math.cos(angle - 0.4), tipY - 7 * Math.sin(angle - 0.4));
+    context.moveTo(tipX, tipY);
+    context.lineTo(tipX - 7 * Math.cos(angle + 0.4), tipY - 7 * Math.sin(angle + 0.4));
+  }
+  context.stroke();
+}
+function nodeAt(x, y) {
+  let best = -1, bestDistance = Infinity;
+  for (let i = 0; i < nodes.length; i++) {
+    const dx = screenX(i) - x, dy = screenY(i) - y, distance = dx * dx + dy * dy;
+    if (distance < bestDistance && distance < Math.max(64, radius[i] * radius[i])) { best = i; bestDistance = distance; }
+  }
+  return best;
+}
+function select(i) {
+  selected = i;
+  const info = document.getElementById("info");
+  if (i < 0) { info.style.display = "none"; redraw(); return; }
+  const node = nodes[i];
+  let rows = "";
+  for (const e of neighbours[i]) {
+    const edge = edges[e];
+    const direction = edge[0] === i ? "&rarr; " + escapeHtml(nodes[edge[1]].id) : "&larr; " + escapeHtml(nodes[edge[0]].id);
+    const types = Object.entries(edge[3]).map(([type, count]) => escapeHtml(type) + " (" + count + ")").join(", ");
+    rows += "<tr><td>" + direction + "</td><td>" + types + "</td></tr>";
+  }
+  info.innerHTML = "<b>" + escapeHtml(node.id) + "</b><br>Nodes: " + node.count + ", properties: " + node.properties +
+    "<table>" + rows + "</table>";
+  info.style.display = "block";
+  redraw();
+}
+let dragging = null;
+canvas.addEventListener("mousedown", event => { dragging = {x: event.clientX, y: event.clientY, moved: false}; });
+window.addEventListener("mouseup", event => {
+  if (dragging && !dragging.moved) select(nodeAt(event.clientX, event.clientY));
+  dragging = null;
+});
+canvas.addEventListener("mousemove", event => {
+  if (dragging) {
+    offsetX += event.clientX - dragging.x;
+    offsetY += event.clientY - dragging.y;
+    dragging.moved = dragging.moved || Math.abs(event.clientX - dragging.x) + Math.abs(event.clientY - dragging.y) > 0;
+    dragging.x = event.clientX;
+    dragging.y = event.clientY;
+    redraw();
+    return;
+  }
+  const i = nodeAt(event.clientX, event.clientY);
+  if (i !== hovered) { hovered = i; redraw(); }
+});
+canvas.addEventListener("wheel", event => {
+  event.preventDefault();
+  const factor = Math.exp(-event.deltaY * 0.0015);
+  offsetX = event.clientX - (event.clientX - offsetX) * factor;
+  offsetY = event.clientY - (event.clientY - offsetY) * factor;
+  scale *= factor;
+  redraw();
+}, {passive: false});
+document.getElementById("search").addEventListener("change", event => {
+  const i = indexById.get(event.target.value);
+  if (i === undefined) return;
+  offsetX = canvas.width / 2 - nodes[i].x * scale;
+  offsetY = canvas.height / 2 - nodes[i].y * scale;
+  select(i);
+});
+window.addEventListener("resize", fit);
+fit();
+</script>
+</body>
+</html>
+"""
+
+
+# Function to build the label-level directed graph of the whole schema from the records
+def build_schema_graph(records):
+    import networkx as nx
+
+    G = nx.DiGraph()
+    for record in records:
+        G.add_node(record["label"], count=record["count"], properties=len(record["properties"]))
+
+    # Outgoing patterns are enough, every relationship is the outgoing relationship of its source label
+    for record in records:
+        for pattern in record["outgoing_patterns"]:
+            for target in pattern["labels"] or [graph_node_name([])]:
+                if not G.has_node(target):
+                    G.add_node(target, count=0, properties=0)
+                if not G.has_edge(record["label"], target):
+                    G.add_edge(record["label"], target, relationship_counts={})
+                relationship_counts = G.edges[record["label"], target]["relationship_counts"]
+                relationship_counts[pattern["type"]] = relationship_counts.get(pattern["type"], 0) + (pattern["count"] or 0)
+
+    for _, _, data in G.edges(data=True):
+        data["relationship"] = ", ".join(sorted(data["relationship_counts"]))
+        data["count"] = sum(data["relationship_counts"].values())
+    return G
+
+
+# Function to write the schema graph as GraphML, which only supports scalar attributes
+def write_schema_graphml(G, filename):
+    import networkx as nx
+
+    graphml = G.copy()
+    for _, _, data in graphml.edges(data=True):
+        data["relationship_counts"] = json.dumps(data["relationship_counts"], sort_keys=True)
+    nx.write_graphml(graphml, filename)
+    print(f"Schema graph written to {filename}")
+
+
+# Function to build the JSON data of the schema graph with layout coordinates scaled to [-1, 1]
+def schema_graph_data(G, pos):
+    extent = max((max(abs(x), abs(y)) for x, y in pos.values()), default=1) or 1
+    index = {node: i for i, node in enumerate(G.nodes)}
+    return {
+        "nodes": [
+            {
+                "id": str(node),
+                "count": data.get("count", 0),
+                "properties": data.get("properties", 0),
+                "x": round(float(pos[node][0]) / extent, 5),
+                "y": round(float(pos[node][1]) / extent, 5),
+            }
+            for node, data in G.nodes(data=True)
+        ],
+        # Edges are compact [source index, target index, count, {type: count}] lists to keep the viewer small
+        "edges": [
+            [index[source], index[target], data["count"], data["relationship_counts"]]
+            for source, target, data in G.edges(data=True)
+        ],
+    }
+
+
+# Function to export the schema graph as GraphML, JSON and a self-contained HTML viewer
+def write_schema_graph(G, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Computing layout of the schema graph with {G.number_of_nodes()} labels...")
+    pos = layout_graph(G, os.path.join(output_dir, LAYOUT_CACHE_DIR), k=None)
+    data = schema_graph_data(G, pos)
+
+    write_schema_graphml(G, os.path.join(output_dir, f"{SCHEMA_GRAPH_NAME}.graphml"))
+
+    json_file = os.path.join(output_dir, f"{SCHEMA_GRAPH_NAME}.json")
+    with open(json_file, mode="w", encoding="utf-8") as file:
+        json.dump(data, file)
+    print(f"Schema graph written to {json_file}")
+
+    html_file = os.path.join(output_dir, f"{SCHEMA_GRAPH_NAME}.html")
+    # "</" is escaped so a label can never close the script element
+    embedded = json.dumps(data).replace("</", "<\\/")
+    with open(html_file, mode="w", encoding="utf-8") as file:
+        file.write(HTML_TEMPLATE.replace("__SCHEMA_DATA__", embedded))
+    print(f"Schema graph viewer written to {html_file}")
+
+
+# Sink exporting the label-level graph of the whole schema once all labels are extracted
+class SchemaGraphSink:
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.records = []
+
+    def write(self, record):
+        # Only the fields the schema graph needs are kept
+        self.records.append({
+            "label": record["label"],
+            "count": record["count"],
+            "properties": record["properties"],
+            "outgoing_patterns": record["outgoing_patterns"],
+        })
+
+    def close(self):
+        write_schema_graph(build_schema_graph(self.records), self.output_dir)
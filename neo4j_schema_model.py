@@ -0,0 +1,140 @@
+"""
+This Python module holds the compact in-memory schema model the bulk extraction builds before any record is written. On big schemas (thousands of labels, tens of thousands of relationship patterns) a dict per label with formatted relationship strings copies every pattern once per label of its source and target nodes, so the model keeps every piece of the schema exactly once:
+- Strings: Label names, relationship types and property keys are interned, and labels and relationship types are referred to by integer id.
+- Label Combinations: The label list of a node (e.g. ["Person", "Employee"]) is stored once as a tuple of label ids and referred to by id.
+- Relationships: Every aggregated (source labels, relationship type, target labels) row becomes two entries in flat integer arrays, one outgoing entry (type id, target combination id, count, estimated flag) shared by every source label and one incoming entry (type id, source combination id, count) shared by every target label.
+- Labels: One __slots__ entry per label with its count, property keys, sampling and status, and integer arrays of the ids of its incoming and outgoing entries.
+
+Records are only created when they are iterated, one label at a time, with the incoming_patterns and outgoing_patterns of the label. The combined list of all relationships and the formatted strings are not stored at all, the output sinks build them from the patterns when they write a record.
+"""
+
+import sys
+from array import array
+
+
+# Entry of one label, the relationships are ids of entries in the pattern arrays of the model
+class LabelEntry:
+    __slots__ = ("count", "properties", "sample_size", "incoming", "outgoing", "complete", "degraded")
+
+    def __init__(self, count=0):
+        self.count = count
+        self.properties = ()
+        # None when the property keys were read from every node
+        self.sample_size = None
+        self.incoming = array("i")
+        self.outgoing = array("i")
+        self.complete = True
+        self.degraded = ()
+
+
+# Deduplicated schema of a database, filled by the bulk extraction and turned into records on demand
+class SchemaModel:
+    __slots__ = ("labels", "label_ids", "listed", "types", "type_ids", "combinations", "combination_ids", "entry_types", "entry_labels", "entry_counts", "entry_estimated", "entries")
+
+    def __init__(self):
+        self.labels = []
+        self.label_ids = {}
+        # Ids of the labels added with add_label, connected labels only seen in relationships get no record
+        self.listed = {}
+        self.types = []
+        self.type_ids = {}
+        self.combinations = []
+        self.combination_ids = {}
+        # One position per relationship entry: the type id, the id of the connected label combination, the relationship count and whether the count is estimated
+        self.entry_types = array("i")
+        self.entry_labels = array("i")
+        self.entry_counts = array("q")
+        self.entry_estimated = array("b")
+        # One LabelEntry per label id
+        self.entries = []
+
+    def label_id(self, label):
+        if label not in self.label_ids:
+            self.label_ids[label] = len(self.labels)
+            self.labels.append(sys.intern(label))
+            self.entries.append(LabelEntry())
+        return self.label_ids[label]
+
+    def type_id(self, relationship_name):
+        if relationship_name not in self.type_ids:
+            self.type_ids[relationship_name] = len(self.types)
+            self.types.append(sys.intern(relationship_name))
+        return self.type_ids[relationship_name]
+
+    def combination_id(self, labels):
+        key = tuple(self.label_id(label) for label in labels)
+        if key not in self.combination_ids:
+            self.combination_ids[key] = len(self.combinations)
+            self.combinations.append(key)
+        return self.combination_ids[key]
+
+    def add_label(self, label, count):
+        label_id = self.label_id(label)
+        self.listed[label_id] = None
+        self.entries[label_id].count = count
+
+    def set_properties(self, label, properties, sample_size=None):
+        entry = self.entries[self.label_id(label)]
+        entry.properties = tuple(sys.intern(key) for key in properties)
+        entry.sample_size = sample_size
+
+    def mark_failed(self, label):
+        self.entries[self.label_id(label)].complete = False
+
+    def mark_degraded(self, label, part):
+        entry = self.entries[self.label_id(label)]
+        entry.degraded += (part,)
+
+    def add_entry(self, relationship_name, connected_labels, count, estimated=False):
+        self.entry_types.append(self.type_id(relationship_name))
+        self.entry_labels.append(self.combination_id(connected_labels))
+        self.entry_counts.append(count)
+        self.entry_estimated.append(estimated)
+        return len(self.entry_counts) - 1
+
+    # Adds one row of the aggregated relationship query, outgoing for every source label and incoming for every target label
+    def add_relationships(self, source_labels, relationship_name, target_labels, count):
+        outgoing = self.add_entry(relationship_name, target_labels, count)
+        incoming = self.add_entry(relationship_name, source_labels, count)
+        for label in source_labels:
+            self.entries[self.label_id(label)].outgoing.append(outgoing)
+        for label in target_labels:
+            self.entries[self.label_id(label)].incoming.append(incoming)
+
+    # Adds the patterns one label discovered on its own ("incoming" or "outgoing"), e.g. from the per-label relationship queries
+    def add_label_patterns(self, label, direction, patterns):
+        ids = getattr(self.entries[self.label_id(label)], direction)
+        for pattern in patterns:
+            ids.append(self.add_entry(pattern["type"], pattern["labels"], pattern["count"], pattern.get("estimated", False)))
+
+    # Returns the patterns of a label in one direction, entries with the same type and connected labels are summed
+    # and the sum is estimated when any of its entries is
+    def patterns(self, label, direction):
+        merged = {}
+        for entry_id in getattr(self.entries[self.label_ids[label]], direction):
+            key = (self.entry_types[entry_id], self.entry_labels[entry_id])
+            count, estimated = merged.get(key, (0, False))
+            merged[key] = (count + self.entry_counts[entry_id], estimated or bool(self.entry_estimated[entry_id]))
+        return [
+            {"type": self.types[type_id], "labels": [self.labels[label_id] for label_id in self.combinations[combination_id]], "count": count, "estimated": estimated}
+            for (type_id, combination_id), (count, estimated) in merged.items()
+        ]
+
+    def record(self, label):
+        entry = self.entries[self.label_ids[label]]
+        return {
+            "label": label,
+            "count": entry.count,
+            "properties": list(entry.properties),
+            "incoming_patterns": self.patterns(label, "incoming"),
+            "outgoing_patterns": self.patterns(label, "outgoing"),
+            "properties_exact": entry.sample_size is None,
+            "properties_sample_size": entry.count if entry.sample_size is None else entry.sample_size,
+            "complete": entry.complete,
+            "degraded": list(entry.degraded),
+        }
+
+    # Yields the record of every label in the order the labels were added, each record is created when it is requested
+    def iter_records(self):
+        for label_id in list(self.listed):
+            yield self.record(self.labels[label_id])
@@ -0,0 +1,517 @@
+"""
+This Python module contains the output sinks for the schema records produced by the shared extraction engine. Every sink receives the records one label at a time through write(record) and finishes its output in close(), so a single extraction can feed any number of outputs:
+- CsvSink: One row per label with the node count, properties and relationships.
+- StreamingCsvSink: The same rows, written to an open CSV file as soon as each label is extracted and flushed periodically.
+- ExcelSink: One sheet per label with the properties and relationships in separate rows.
+- StreamingExcelSink: The same sheets, written with a write-only workbook as soon as each label is extracted, plus an index sheet listing every label.
+- GraphImageSink: One PNG network graph per label, showing its incoming and outgoing relationships. Graphs are rendered on a process pool with the Agg backend, graphs that did not change since the last run are skipped, and computed layouts are cached on disk.
+
+The libraries for Excel and graph output are only imported by the sinks that need them.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+from neo4j_schema_extractor import all_patterns, describe_count, describe_degradation, describe_property_sampling, format_pattern_counts, format_patterns
+
+logger = logging.getLogger(__name__)
+
+# Header of the CSV export
+CSV_HEADER = ["Label", "Node Count", "Properties", "Relationships", "Incoming Relationships", "Outgoing Relationships", "Property Sampling", "Degraded", "Relationship Counts"]
+# Columns added to the CSV export when the property values were profiled
+PROPERTY_STATS_HEADER = ["Property Types", "Property Fill Rates", "Property Distinct Counts", "Property Ranges", "Profiled Nodes"]
+# Name and header of the sheet listing the property statistics of every label in the Excel export
+PROPERTY_STATS_SHEET = "Property Statistics"
+PROPERTY_STATS_SHEET_HEADER = ["Label", "Property", "Types", "Fill Rate", "Distinct (approx.)", "Min", "Max", "Min Length", "Max Length", "Examples", "Profiled Nodes"]
+# Number of rows after which the streaming CSV export is flushed to disk
+CSV_FLUSH_EVERY = 100
+# Header of the index sheet in the streaming Excel export
+INDEX_HEADER = ["Label", "Sheet", "Node Count", "Properties", "Relationships", "Property Sampling", "Degraded"]
+# Name of the index sheet in the streaming Excel export
+INDEX_SHEET = "Index"
+# Maximum length of an Excel sheet name
+MAX_SHEET_NAME_LENGTH = 31
+# File in the graph output directory recording the hash of every rendered graph
+RENDER_MANIFEST = ".render_manifest.json"
+# Maximum number of graphs waiting for or being rendered per worker process, each pending graph is held until it is drawn
+PENDING_RENDERS_PER_WORKER = 2
+# Directory in the graph output directory where computed layouts are cached
+LAYOUT_CACHE_DIR = ".layouts"
+# Header of every sheet in the Excel export
+EXCEL_HEADER = ["Label", "Property", "All Relationship", "Incoming Relationship", "Outgoing Relationship", "Property Sampling", "Relationship Count", "Degraded"]
+
+
+# Function to describe the value range of a property, e.g. "1..99" or "length 3..40"
+def describe_range(stats):
+    ranges = []
+    if stats["min"] is not None:
+        ranges.append(f"{stats['min']}..{stats['max']}")
+    if stats["min_length"] is not None:
+        ranges.append(f"length {stats['min_length']}..{stats['max_length']}")
+    return ", ".join(ranges)
+
+
+# Function to describe how many of the nodes of a label were profiled, e.g. "100000 of 400000000 nodes (0.03%)"
+def describe_profiled_nodes(record):
+    nodes, count = record["property_stats_nodes"], record["count"]
+    if nodes >= count:
+        return f"all {nodes} nodes"
+    return f"{nodes} of {count} nodes ({nodes / count:.2%})"
+
+
+# Function to build the property statistics columns of the CSV row of a record, one "key: value" entry per property
+def property_stats_columns(record):
+    property_stats = record["property_stats"]
+    return [
+        "; ".join(f"{key}: {', '.join(stats['types'])}" for key, stats in property_stats.items()),
+        "; ".join(f"{key}: {stats['fill_rate']:.1%}" for key, stats in property_stats.items()),
+        "; ".join(f"{key}: {stats['distinct']}" for key, stats in property_stats.items()),
+        "; ".join(f"{key}: {describe_range(stats)}" for key, stats in property_stats.items() if describe_range(stats)),
+        describe_profiled_nodes(record),
+    ]
+
+
+# Function to build the rows of the property statistics sheet for a record
+def property_stats_rows(record):
+    for key, stats in record.get("property_stats", {}).items():
+        yield [
+            record["label"],
+            key,
+            ", ".join(f"{type_name} ({count})" for type_name, count in stats["types"].items()),
+            round(stats["fill_rate"], 4),
+            stats["distinct"],
+            stats["min"],
+            stats["max"],
+            stats["min_length"],
+            stats["max_length"],
+            ", ".join(stats["examples"]),
+            describe_profiled_nodes(record),
+        ]
+
+
+# Function to build the CSV row of a record
+def csv_row(record):
+    # The relationships are only formatted as strings here, the records hold the patterns
+    incoming_relationships = format_patterns(record["incoming_patterns"])
+    outgoing_relationships = format_patterns(record["outgoing_patterns"])
+    # Combine all relationships into a single field for the 'Relationships' column
+    all_relationships = incoming_relationships + outgoing_relationships
+    row = [
+        record["label"],
+        record["count"],
+        ", ".join(record["properties"]),
+        ", ".join(all_relationships),
+        ", ".join(incoming_relationships),
+        ", ".join(outgoing_relationships),
+        describe_property_sampling(record),
+        describe_degradation(record),
+        ", ".join(format_pattern_counts(all_patterns(record)))
+    ]
+    # The property statistics columns are only added when the property values were profiled
+    if "property_stats" in record:
+        row += property_stats_columns(record)
+    return row
+
+
+# Function to build the Excel data entry of a record
+def excel_row(record):
+    incoming_relationships = format_patterns(record["incoming_patterns"])
+    outgoing_relationships = format_patterns(record["outgoing_patterns"])
+    # Combine all relationships in one field for the 'All Relationships' column
+    all_relationships = incoming_relationships + outgoing_relationships
+    # Relationship counts in the same order as all_relationships, estimated counts are prefixed with "~"
+    relationship_counts = [describe_count(pattern) for pattern in all_patterns(record)]
+    return [
+        record["label"],
+        record["properties"],
+        all_relationships,
+        incoming_relationships,
+        outgoing_relationships,
+        describe_property_sampling(record),
+        relationship_counts,
+        describe_degradation(record)
+    ]
+
+
+# Function to build a valid Excel sheet name for a label that is not used yet
+# Excel limits names to 31 characters and compares them case-insensitively, so truncated labels can collide
+def unique_sheet_name(label, used_names):
+    name = re.sub(r"[\[\]:*?/\\]", "_", label)[:MAX_SHEET_NAME_LENGTH] or "_"
+    suffix = 1
+    candidate = name
+    while candidate.lower() in used_names:
+        suffix += 1
+        candidate = f"{name[:MAX_SHEET_NAME_LENGTH - len(str(suffix)) - 1]}~{suffix}"
+    used_names.add(candidate.lower())
+    return candidate
+
+
+# Function to build the rows of a label's sheet from its Excel data entry
+def excel_sheet_rows(label, properties, all_relationships, incoming_relationships, outgoing_relationships, property_sampling, relationship_counts, degradation=""):
+    # Write properties, each in a separate row
+    max_rows = max(len(properties), len(all_relationships), len(incoming_relationships), len(outgoing_relationships))
+
+    for i in range(max_rows):
+        yield [
+            label if i == 0 else "",  # Only write the label name in the first row
+            properties[i] if i < len(properties) else "",
+            all_relationships[i] if i < len(all_relationships) else "",
+            incoming_relationships[i] if i < len(incoming_relationships) else "",
+            outgoing_relationships[i] if i < len(outgoing_relationships) else "",
+            property_sampling if i == 0 else "",  # Whether the properties are exact or sampled
+            relationship_counts[i] if i < len(relationship_counts) else "",  # Count of the relationship in the 'All Relationship' column
+            degradation if i == 0 else ""  # Which parts come from the fallback queries of a label that ran out of time
+        ]
+
+
+# Function to write the results to a CSV file
+def write_to_csv(data, filename, header=CSV_HEADER):
+    print(f"Writing data to {filename}...")
+    try:
+        with open(filename, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            for row in data:
+                logger.debug("Writing row: %s", row)
+                writer.writerow(row)
+        print(f"Data successfully written to {filename}")
+    except Exception as e:
+        print(f"Error writing to CSV: {e}")
+
+
+# Function to write the results to an Excel file with multiple sheets, sorted alphabetically by label name
+def write_to_excel(data, filename, stats_rows=None):
+    import openpyxl
+
+    print(f"Writing data to {filename}...")
+
+    # Sort data alphabetically by label name
+    data.sort(key=lambda x: x[0])
+
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)  # Remove the default sheet
+    # The property statistics sheet name is reserved, so no label sheet can take it
+    used_names = {PROPERTY_STATS_SHEET.lower()} if stats_rows else set()
+
+    for row_data in data:
+        label = row_data[0]
+        # Create a new sheet for each label in alphabetical order, with a unique name of at most 31 characters
+        worksheet = workbook.create_sheet(title=unique_sheet_name(label, used_names))
+
+        # Write the header
+        worksheet.append(EXCEL_HEADER)
+
+        for row in excel_sheet_rows(*row_data):
+            worksheet.append(row)
+
+        print(f"Data written for sheet: {label}")
+
+    if stats_rows:
+        worksheet = workbook.create_sheet(title=PROPERTY_STATS_SHEET)
+        worksheet.append(PROPERTY_STATS_SHEET_HEADER)
+        for row in stats_rows:
+            worksheet.append(row)
+        print(f"Data written for sheet: {PROPERTY_STATS_SHEET}")
+
+    workbook.save(filename)
+    print(f"Data successfully written to {filename}")
+
+
+# Function to name the graph node of a connected label combination, e.g. "A, B" for nodes with both labels
+def graph_node_name(connected_labels):
+    return ", ".join(connected_labels) if connected_labels else "(no label)"
+
+
+# Function to add a relationship pattern to a graph edge
+# A DiGraph holds one edge per node pair, so several relationship types between the same labels share the edge
+def add_pattern_edge(G, source, target, pattern, direction):
+    if G.has_edge(source, target):
+        edge = G.edges[source, target]
+        if pattern["type"] not in edge["relationships"]:
+            edge["relationships"].append(pattern["type"])
+            edge["relationship"] = ", ".join(edge["relationships"])
+        edge["count"] += pattern["count"] or 0
+    else:
+        G.add_edge(
+            source,
+            target,
+            relationship=pattern["type"],
+            relationships=[pattern["type"]],
+            direction=direction,
+            count=pattern["count"] or 0,
+        )
+
+
+# Function to build the directed graph of a label's incoming and outgoing relationships
+# The graph is built straight from the label's patterns, so every pattern is visited exactly once
+def build_relationship_graph(record):
+    import networkx as nx
+
+    label = record["label"]
+    G = nx.DiGraph()
+    G.add_node(label)
+
+    # Add edges for incoming relationships
+    for pattern in record["incoming_patterns"]:
+        source = graph_node_name(pattern["labels"])
+        # Relationships between nodes with only this label are already added as outgoing relationships
+        if source != label:
+            add_pattern_edge(G, source, label, pattern, "incoming")
+
+    # Add edges for outgoing relationships
+    for pattern in record["outgoing_patterns"]:
+        add_pattern_edge(G, label, graph_node_name(pattern["labels"]), pattern, "outgoing")
+
+    return G
+
+
+# Function to hash a graph, either with its edge attributes (for the rendered image) or its structure only (for the layout)
+def graph_hash(G, with_attributes=True):
+    nodes = sorted(str(node) for node in G.nodes)
+    edges = sorted(
+        [str(source), str(target), json.dumps(data, sort_keys=True) if with_attributes else ""]
+        for source, target, data in G.edges(data=True)
+    )
+    return hashlib.sha256(json.dumps([nodes, edges]).encode("utf-8")).hexdigest()
+
+
+# Function to compute the layout of a graph, reusing a cached layout of a graph with the same structure
+# k is the optimal node distance of the spring layout, None lets NetworkX scale it with the number of nodes
+def layout_graph(G, layout_dir, k=1):
+    import networkx as nx
+
+    layout_file = os.path.join(layout_dir, f"{graph_hash(G, with_attributes=False)}_{k}.json")
+    if os.path.exists(layout_file):
+        try:
+            with open(layout_file, encoding="utf-8") as file:
+                positions = json.load(file)
+            return {node: tuple(positions[str(node)]) for node in G.nodes}
+        except Exception as e:
+            print(f"Error reading cached layout {layout_file}: {e}")
+
+    pos = nx.spring_layout(G, k=k)
+    os.makedirs(layout_dir, exist_ok=True)
+    with open(layout_file, mode="w", encoding="utf-8") as file:
+        json.dump({str(node): [float(x), float(y)] for node, (x, y) in pos.items()}, file)
+    return pos
+
+
+# Function to get the image path of a label's network graph
+def graph_image_path(label, output_dir):
+    return os.path.join(output_dir, f"{label}_network_graph.png")
+
+
+# Function to render the network graph of a label with a cached layout, run in the rendering worker processes
+def render_network_graph(label, G, output_dir):
+    import matplotlib
+    matplotlib.use("Agg")  # Render to files only, without a display
+
+    pos = layout_graph(G, os.path.join(output_dir, LAYOUT_CACHE_DIR))
+    return draw_network_graph(label, G, output_dir, pos)
+
+
+# Function to draw the network graph of a label and save it as an image in the output directory
+def draw_network_graph(label, G, output_dir, pos=None):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    plt.figure(figsize=(10, 8))
+    if pos is None:
+        pos = nx.spring_layout(G, k=1)
+    nx.draw(
+        G,
+        pos,
+        with_labels=True,
+        node_size=5000,
+        node_color="lightcoral",
+        font_size=12,
+        font_weight="bold",
+        arrows=True
+    )
+    plt.title(f"Network Graph of '{label}' Relationships")
+
+    # Save the plot as an image in the output directory
+    output_path = graph_image_path(label, output_dir)
+    plt.savefig(output_path)
+    plt.close()
+    print(f"Saved network graph for '{label}' at {output_path}")
+    return output_path
+
+
+# Sink writing one CSV row per label
+class CsvSink:
+    def __init__(self, filename):
+        self.filename = filename
+        self.data = []
+        self.property_stats = False
+
+    def write(self, record):
+        self.data.append(csv_row(record))
+        self.property_stats = self.property_stats or "property_stats" in record
+
+    def close(self):
+        write_to_csv(self.data, self.filename, CSV_HEADER + PROPERTY_STATS_HEADER if self.property_stats else CSV_HEADER)
+
+
+# Sink writing one CSV row per label as soon as the label is extracted
+# Rows go straight into the open file, so memory does not grow with the number of labels
+class StreamingCsvSink:
+    def __init__(self, filename, header=CSV_HEADER, flush_every=CSV_FLUSH_EVERY):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.rows = 0
+        self.file = open(filename, mode="w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+        print(f"Streaming data to {filename}...")
+
+    def write(self, record):
+        row = csv_row(record)
+        logger.debug("Writing row: %s", row)
+        self.writer.writerow(row)
+        self.rows += 1
+        # Flushed regularly, so the rows written so far survive an interrupted run
+        if self.rows % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+        print(f"Data successfully written to {self.filename}")
+
+
+# Sink writing one Excel sheet per label
+class ExcelSink:
+    def __init__(self, filename):
+        self.filename = filename
+        self.data = []
+        self.property_stats_rows = []
+
+    def write(self, record):
+        self.data.append(excel_row(record))
+        self.property_stats_rows.extend(property_stats_rows(record))
+
+    def close(self):
+        write_to_excel(self.data, self.filename, self.property_stats_rows)
+
+
+# Sink writing one Excel sheet per label as soon as the label is extracted
+# The write-only workbook streams rows to temporary files, so memory does not grow with the number of labels
+class StreamingExcelSink:
+    def __init__(self, filename):
+        import openpyxl
+
+        self.filename = filename
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.used_names = {INDEX_SHEET.lower(), PROPERTY_STATS_SHEET.lower()}
+        # The index sheet is created first so it is the first sheet of the workbook, its rows are added per label
+        self.index = self.workbook.create_sheet(title=INDEX_SHEET)
+        self.index.append(INDEX_HEADER)
+        # Created with the first profiled label
+        self.property_stats_sheet = None
+        print(f"Streaming data to {filename}...")
+
+    def write(self, record):
+        row_data = excel_row(record)
+        sheet_name = unique_sheet_name(record["label"], self.used_names)
+        worksheet = self.workbook.create_sheet(title=sheet_name)
+        worksheet.append(EXCEL_HEADER)
+        for row in excel_sheet_rows(*row_data):
+            worksheet.append(row)
+        # Every open write-only sheet holds a temporary file, only the Index and Property Statistics sheets stay open
+        worksheet.close()
+        self.index.append([
+            record["label"],
+            sheet_name,
+            record["count"],
+            len(record["properties"]),
+            len(record["incoming_patterns"]) + len(record["outgoing_patterns"]),
+            describe_property_sampling(record),
+            describe_degradation(record)
+        ])
+        print(f"Data written for sheet: {sheet_name}")
+        if "property_stats" in record:
+            if self.property_stats_sheet is None:
+                self.property_stats_sheet = self.workbook.create_sheet(title=PROPERTY_STATS_SHEET)
+                self.property_stats_sheet.append(PROPERTY_STATS_SHEET_HEADER)
+            for row in property_stats_rows(record):
+                self.property_stats_sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.filename)
+        print(f"Data successfully written to {self.filename}")
+
+
+# Sink drawing one PNG network graph per label on a pool of worker processes
+# Graphs whose hash matches the last run and whose image still exists are not rendered again
+# The workers are spawned rather than forked, since the extraction runs driver and worker threads that a fork would copy mid-operation
+class GraphImageSink:
+    def __init__(self, output_dir, workers=None):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest_file = os.path.join(output_dir, RENDER_MANIFEST)
+        self.previous_hashes = self.load_manifest()
+        self.rendered_hashes = {}
+        workers = workers or os.cpu_count() or 1
+        # With a single worker the graphs are rendered in this process
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) if workers > 1 else None
+        self.max_pending = workers * PENDING_RENDERS_PER_WORKER
+        self.futures = {}
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, encoding="utf-8") as file:
+                return json.load(file)
+        except Exception as e:
+            print(f"Error reading render manifest {self.manifest_file}: {e}")
+            return {}
+
+    def write(self, record):
+        label = record["label"]
+        G = build_relationship_graph(record)
+        render_hash = graph_hash(G)
+        if self.previous_hashes.get(label) == render_hash and os.path.exists(graph_image_path(label, self.output_dir)):
+            print(f"Network graph for '{label}' unchanged, skipping")
+            self.rendered_hashes[label] = render_hash
+            return
+        if self.executor:
+            # Wait for a render to finish before queueing another one, so the pending graphs do not grow with the number of labels
+            if len(self.futures) >= self.max_pending:
+                done, _ = wait(self.futures, return_when=FIRST_COMPLETED)
+                self.collect(done)
+            self.futures[self.executor.submit(render_network_graph, label, G, self.output_dir)] = (label, render_hash)
+        else:
+            render_network_graph(label, G, self.output_dir)
+            self.rendered_hashes[label] = render_hash
+
+    # Function to record the finished renders and drop their futures
+    def collect(self, futures):
+        for future in futures:
+            label, render_hash = self.futures.pop(future)
+            try:
+                future.result()
+                self.rendered_hashes[label] = render_hash
+            except Exception as e:
+                print(f"Error rendering network graph for '{label}': {e}")
+
+    def close(self):
+        if self.executor:
+            self.collect(wait(self.futures).done)
+            self.executor.shutdown()
+        with open(self.manifest_file, mode="w", encoding="utf-8") as file:
+            json.dump(self.rendered_hashes, file, indent=2)
+
+
+# Sinks by output type, each created with the output file name or directory
+SINKS = {
+    "csv": CsvSink,
+    "xlsx": ExcelSink,
+    "png": GraphImageSink,
+}
@@ -0,0 +1,190 @@
+"""
+This Python module adds incremental extraction on top of the shared schema extraction engine. The records of every run are saved to a JSON snapshot file, together with a cheap fingerprint of each label:
+- Node Count: The count-store node count of the label.
+- Relationship Type Counts: The count-store count of every (:Label)-[:TYPE]->() and ()-[:TYPE]->(:Label) pair.
+- Indexes and Constraints: The indexes and constraints defined on the label.
+
+On the next run the fingerprints are read again (a few count-store and schema queries), and the expensive property and relationship queries only run for labels whose fingerprint changed. All other labels reuse the records from the snapshot. When more than BULK_CHANGED_SHARE of the labels changed, the per-label queries would cost more than the bulk queries, so the whole schema is extracted with the bulk queries instead. If the sampling or relationship discovery settings changed, every label is extracted again.
+
+Every run also produces a schema diff report listing:
+- Added and removed labels
+- Added and removed properties per label
+- Added and removed relationships per label
+"""
+
+import hashlib
+import json
+import os
+
+from neo4j_schema_extractor import (
+    MAX_IN_FLIGHT,
+    extract_labels_concurrently,
+    extract_schema,
+    format_patterns,
+    get_all_labels,
+    get_all_relationship_types,
+    get_label_counts,
+    get_relationship_type_counts,
+)
+
+# Version of the snapshot file format, snapshots with another version are ignored
+SNAPSHOT_VERSION = 1
+
+# Share of changed labels above which the whole schema is extracted with the bulk queries instead of per label
+BULK_CHANGED_SHARE = 0.5
+
+
+# Function to collect the indexes and constraints of every label, e.g. {"Person": ["RANGE(name)", "UNIQUENESS(id)"]}
+def get_label_indexes(session, labels):
+    indexes = {label: [] for label in labels}
+    queries = [
+        "SHOW INDEXES YIELD entityType, labelsOrTypes, properties, type WHERE entityType = 'NODE' RETURN labelsOrTypes, properties, type",
+        "SHOW CONSTRAINTS YIELD entityType, labelsOrTypes, properties, type WHERE entityType = 'NODE' RETURN labelsOrTypes, properties, type",
+    ]
+    for query in queries:
+        try:
+            for record in session.run(query):
+                for label in record["labelsOrTypes"] or []:
+                    indexes.setdefault(label, []).append(f"{record['type']}({', '.join(record['properties'] or [])})")
+        except Exception as e:
+            print(f"Error retrieving indexes and constraints: {e}")
+    return {label: sorted(entries) for label, entries in indexes.items()}
+
+
+# Function to compute the fingerprint of every label from count-store sizes and the label's indexes/constraints
+def get_label_fingerprints(session, labels, counts):
+    type_counts = get_relationship_type_counts(session, labels, get_all_relationship_types(session))
+    indexes = get_label_indexes(session, labels)
+    fingerprints = {}
+    for label in labels:
+        fingerprint = {
+            "count": counts.get(label, 0),
+            "relationship_types": sorted(
+                [relationship_type, direction, count]
+                for (relationship_type, direction), count in type_counts.get(label, {}).items()
+            ),
+            "indexes": indexes.get(label, []),
+        }
+        fingerprints[label] = hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+    return fingerprints, type_counts
+
+
+# Function to load a snapshot file, returning an empty snapshot when it does not exist or cannot be read
+def load_snapshot(filename):
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, encoding="utf-8") as file:
+            snapshot = json.load(file)
+    except Exception as e:
+        print(f"Error reading snapshot {filename}: {e}")
+        return {}
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        print(f"Ignoring snapshot {filename} with unsupported version {snapshot.get('version')}")
+        return {}
+    return snapshot
+
+
+# Function to save the records and fingerprints of a run to a snapshot file
+def save_snapshot(filename, records, fingerprints, settings):
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "settings": settings,
+        "labels": {
+            # Incomplete and degraded records get no fingerprint, so they are extracted again on the next run
+            record["label"]: {
+                "fingerprint": fingerprints.get(record["label"]) if record.get("complete", True) and not record.get("degraded") else None,
+                "record": record,
+            }
+            for record in records
+        },
+    }
+    # Write to a temporary file first, so an interrupted run never leaves a broken snapshot behind
+    temporary_filename = f"{filename}.tmp"
+    with open(temporary_filename, mode="w", encoding="utf-8") as file:
+        json.dump(snapshot, file, indent=2)
+    os.replace(temporary_filename, filename)
+    print(f"Snapshot saved to {filename}")
+
+
+# Function to compare the records of two runs and list the added and removed labels, properties and relationships
+def diff_schemas(old_records, new_records):
+    old_by_label = {record["label"]: record for record in old_records}
+    new_by_label = {record["label"]: record for record in new_records}
+    diff = {
+        "added_labels": sorted(set(new_by_label) - set(old_by_label)),
+        "removed_labels": sorted(set(old_by_label) - set(new_by_label)),
+        "changed_labels": {},
+    }
+    for label in sorted(set(old_by_label) & set(new_by_label)):
+        old, new = old_by_label[label], new_by_label[label]
+        changes = {}
+        # The relationships are compared as formatted strings, so a changed count alone is not reported
+        fields = {
+            "properties": (old["properties"], new["properties"]),
+            "incoming_relationships": (format_patterns(old.get("incoming_patterns", [])), format_patterns(new.get("incoming_patterns", []))),
+            "outgoing_relationships": (format_patterns(old.get("outgoing_patterns", [])), format_patterns(new.get("outgoing_patterns", []))),
+        }
+        for field, (old_values, new_values) in fields.items():
+            added = [value for value in new_values if value not in old_values]
+            removed = [value for value in old_values if value not in new_values]
+            if added:
+                changes[f"added_{field}"] = added
+            if removed:
+                changes[f"removed_{field}"] = removed
+        if changes:
+            diff["changed_labels"][label] = changes
+    return diff
+
+
+# Function to write the schema diff report to a JSON file and print a short summary
+def write_diff_report(diff, filename):
+    print(
+        f"Schema changes: {len(diff['added_labels'])} labels added, {len(diff['removed_labels'])} labels removed, "
+        f"{len(diff['changed_labels'])} labels changed"
+    )
+    try:
+        with open(filename, mode="w", encoding="utf-8") as file:
+            json.dump(diff, file, indent=2)
+        print(f"Schema diff report written to {filename}")
+    except Exception as e:
+        print(f"Error writing schema diff report: {e}")
+
+
+# Function to extract the schema, re-running the expensive queries only for labels whose fingerprint changed
+def extract_schema_incrementally(driver, snapshot_filename, diff_filename=None, sampling=None, discovery=None, max_in_flight=MAX_IN_FLIGHT, budget=None, bulk_share=BULK_CHANGED_SHARE):
+    print(f"Extracting schema incrementally using snapshot {snapshot_filename}...")
+    snapshot = load_snapshot(snapshot_filename)
+    settings = {"sampling": sampling, "discovery": discovery}
+    if snapshot and snapshot.get("settings") != settings:
+        print("Sampling or relationship discovery settings changed, extracting every label again")
+        cached = {}
+    else:
+        cached = snapshot.get("labels", {})
+
+    try:
+        with driver.session() as session:
+            labels = get_all_labels(session)
+            counts = get_label_counts(session, labels)
+            fingerprints, type_counts = get_label_fingerprints(session, labels, counts)
+    except Exception as e:
+        print(f"Error retrieving label fingerprints: {e}")
+        raise
+
+    changed = [label for label in labels if cached.get(label, {}).get("fingerprint") != fingerprints[label]]
+    print(f"Labels found: {len(labels)}, changed since the last snapshot: {len(changed)}")
+
+    if len(changed) > bulk_share * len(labels):
+        # Most labels have to be queried again, so the bulk queries are cheaper than one query set per changed label
+        records = extract_schema(driver, sampling=sampling, discovery=discovery, budget=budget)
+    else:
+        records = extract_labels_concurrently(driver, changed, counts, max_in_flight, sampling, discovery, type_counts, budget)
+        records += [cached[label]["record"] for label in labels if label not in changed]
+    records.sort(key=lambda record: record["label"])
+
+    if diff_filename:
+        old_records = [entry["record"] for entry in snapshot.get("labels", {}).values()]
+        write_diff_report(diff_schemas(old_records, records), diff_filename)
+    if records:
+        save_snapshot(snapshot_filename, records, fingerprints, settings)
+    return records